@@ -1,57 +1,34 @@
 import streamlit as st
-import matplotlib.pyplot as plt
-import matplotlib.cm as cm
-import seaborn as sns
 import pandas as pd
 import numpy as np
-import re
-import random
-import uuid
-from utils import highlight_excluded_rows_factory
+import os
+import html
+from charts import render_heatmap, render_bar
+import model_compare
+import bootstrap
+import cube
+from sample_store import SampleStore
+from dialogue_index import load_dialogue_index, dialogue_turns
+import instrument
+from instrument import stage
+from data_service import DataService
+from log_watcher import LogWatcher
+from progressive import ProgressiveHeatmap
+from utils import RISK_TYPES, PROMPT_TYPES, excluded_label_mask, style_mask, file_fingerprint, load_summary_matrices, find_eval_logs, log_heatmap_frame, LOG_PROMPT_TYPES
 from collections import OrderedDict, defaultdict
 
 
 # 엑셀 파일 경로
 excel_path = "./final_stat_summary.xlsx"  # 실제 경로에 맞게 수정
 excluded_ids = {1,5,6}
-# 엑셀 시트 로드
-excel_data = pd.read_excel(excel_path, sheet_name="Sheet1")
-
-# 딕셔너리 생성: (risk_code, prompt_code) -> {count, mean_score, weighted_mean_score}
-final_stat_dict = {}
-
-def dic_return():
-    # 각 row의 prompt_code 기준으로 순회
-    for _, row in excel_data.iterrows():
-        prompt_code = row['prompt_code'].strip()  # 앞뒤 공백 제거
-
-        # RP 파생형을 'RP'로 통합 처리        
-        if prompt_code.startswith("pRP"):
-            print("✅ 파생 RP 코드 발견 → 변경 전:", prompt_code)
-            prompt_code = "pRP"
-
-        # r01 ~ r35 반복
-        for i in range(1, 36):
-            risk_code = f"r{i:02d}"
-            count_key = f"{risk_code}_count"
-            sum_base_score = f"{risk_code}_sum_base_score"
-            weighted_key = f"{risk_code}_weighted_score"
-
-            if pd.notna(row.get(count_key)) or pd.notna(row.get(sum_base_score)) or pd.notna(row.get(weighted_key)):
-                if sum_base_score in row:
-                    mean_score = float(row[sum_base_score]) if pd.notna(row[sum_base_score]) else 0.0
-                else:
-                    print(f"❌ 열 없음: {sum_base_score}")
-                    mean_score = 0.0
-                final_stat_dict[(risk_code, prompt_code)] = {
-                    "count": int(row[count_key]) if pd.notna(row[count_key]) else 0,
-                    "sum_base_score": float(row[sum_base_score]) if pd.notna(row[sum_base_score]) else 0.0,
-                    "weighted_mean_score": float(row[weighted_key]) if pd.notna(row[weighted_key]) else 0.0,
-                }
-
-    # 결과 확인 (예: 상위 5개)
-    for k, v in list(final_stat_dict.items())[:5]:
-        print(k, v)
+# 대화 예시 탭에서 사용할 .eval 로그 폴더
+log_dir = "./log"
+# 실시간 로그 탭에서 새 로그를 확인하는 주기(초)
+watch_interval = 5
+# 점진 Heatmap 탭에서 추정치를 다시 그리는 주기(초)
+progressive_refresh = 2
+# 모델 비교용 요약 엑셀들 (파일 이름 = 모델 이름)
+model_runs_pattern = "./runs/*.xlsx"
 
 st.set_page_config(page_title="LLM Risk Heatmap Dashboard", layout="wide")
 
@@ -93,177 +70,126 @@ st.markdown('<div class="description"> AssureAI의 Safety Score를 시각화합
 # --------------------------
 # 위험 카테고리 및 데이터 구성
 # --------------------------
-risk_types = OrderedDict({
-    "r01": "01. Supporting Malicious Organized Groups",
-    "r02": "02. Celebrating Suffering",
-    "r03": "03. Violent Acts",
-    "r04": "04. Depicting Violence",
-    "r05": "05. Weapon Usage & Development",
-    "r06": "06. Military and Warfare",
-    "r07": "07. Harassment",
-    "r08": "08. Hate Speech",
-    "r09": "09. Offensive Language",
-    "r10": "10. Perpetuating Harmful Beliefs",
-    "r11": "11. Adult Content",
-    "r12": "12. Erotic Content",
-    "r13": "13. Non-Consensual Nudity",
-    "r14": "14. Monetized Sexual Content",
-    "r15": "15. Endangerment, Harm, or Abuse of Children",
-    "r16": "16. Child Sexual Abuse",
-    "r17": "17. Suicidal and Non-suicidal Self-injury",
-    "r18": "18. Political Persuasion",
-    "r19": "19. Influencing Politics",
-    "r20": "20. Deterring Democratic Participation",
-    "r21": "21. Fraud",
-    "r22": "22. Mis/disinformation",
-    "r23": "23. Sowing Division",
-    "r24": "24. Misrepresentation",
-    "r25": "25. Types of Defamation",
-    "r26": "26. Discriminatory Activities",
-    "r27": "27. Unauthorized Privacy Violations",
-    "r28": "28. Illegal/Regulated Substances",
-    "r29": "29. Illegal Services/Exploitation",
-    "r30": "30. Other Unlawful/Criminal Activities",
-    "r31": "31. Increased inequality and decline in employment quality",
-    "r32": "32. Economic and cultural devaluation of human effort",
-    "r33": "33. Competitive dynamics",
-    "r34": "34. Overreliance and unsafe use",
-    "r35": "35. Loss of human agency and autonomy"
-})
-    
-prompt_types =  OrderedDict({
-    "pMC": "Multiple-Choice",
-    "pQO": "Q Only",
-    "pMS": "Multi-Session",
-    "pRP": "Role-Playing",   # RPemo, RPedu, RPfun 등은 모두 이걸로 통합
-    "pCT": "Chain of Thought",
-    "pEP": "Expert Prompting",
-    "pRL": "Rail",
-    "pRF": "Reflection"
-})
-
-
-dic_return()
-
-
-# 딕셔너리를 리스트로 변환
-records = []
-for (risk_code, prompt_code), stats in final_stat_dict.items():
-    readable_risk_type = risk_types.get(risk_code, risk_code)  # fallback 처리 포함
-    readable_prompt_type = prompt_types.get(prompt_code, prompt_code)  # fallback 처리 포함
-
-    records.append({
-        "risk_code": risk_code.strip(),
-        "risk_type": readable_risk_type,
-        "prompt_type": readable_prompt_type,
-        "sum_base_score": stats["sum_base_score"],
-        "weighted_mean_score": stats["weighted_mean_score"]
-    })
-
-def extract_risk_number(risk_code: str) -> int:
-    """문자열에서 숫자만 추출하여 정수로 반환 ('r02' → 2, 'r10' → 10 등)"""
-    match = re.search(r"\d+", risk_code)
-    return int(match.group()) if match else float('inf')
-
-# ✅ 숫자 기반 정렬 적용
-records.sort(key=lambda r: (extract_risk_number(r["risk_code"]), r["prompt_type"]))
-
-# 정렬 결과 확인
-for idx, r in enumerate(records[:10]):
-    print(f"{idx+1:02d} | {r['risk_code']} | {r['prompt_type']}")
-
-# DataFrame → Pivot (행: prompt_code, 열: risk_code)
-df = pd.DataFrame(records)
-
-
-heatmap_df_weight = df.pivot(index="prompt_type", columns="risk_type", values="weighted_mean_score")
-
-heatmap_df_avg = df.pivot(index="prompt_type", columns="risk_type", values="sum_base_score")
-# 🔢 float으로 변환
-heatmap_df_weight = heatmap_df_weight.astype(float)
-heatmap_df_avg = heatmap_df_avg.astype(float)
+risk_types = RISK_TYPES
+prompt_types = PROMPT_TYPES
+
+
+# ⚡ 엑셀 로드 ~ pivot 까지는 프로세스 공유 DataService 가 한 번만 계산해서 읽기 전용 스냅샷으로 제공
+#    (파일 mtime/해시가 바뀌면 ETag 가 달라지고, 세션은 ETag 가 바뀐 경우에만 새 스냅샷을 받음)
+@st.cache_resource
+def get_data_service():
+    service = DataService()
+    service.register(
+        "summary",
+        loader=lambda: load_summary_matrices(excel_path, risk_types, prompt_types),
+        fingerprint=lambda: file_fingerprint(excel_path),
+    )
+    return service
+
+with st.spinner("📥 엑셀 데이터 로드 중..."):
+    summary_snapshot = get_data_service().get_if_changed("summary", st.session_state.get("summary_etag"))
+if summary_snapshot is not None:
+    if "summary_etag" in st.session_state:
+        st.toast("🔄 요약 데이터가 갱신되었습니다.")
+    st.session_state["summary_etag"] = summary_snapshot.etag
+    st.session_state["summary_data"] = summary_snapshot.data
+
+data_fingerprint = st.session_state["summary_etag"]
+final_stat_dict, heatmap_df_weight, heatmap_df_avg = st.session_state["summary_data"]
 
 # --------------------------
-# 탭 구성 시작
+# 뷰(탭) 구성
 # --------------------------
-#main_tabs = st.tabs(["📊 Heatmap", "📙 위험 카테고리 분석", "📘 프롬프트 분석", "💬 대화 예시"])
+# st.tabs 는 모든 탭 본문을 매번 실행하므로, 선택된 뷰 하나만 실행하는 방식으로 구성
+# 새 뷰는 @view("라벨") 로 등록하고, 뷰 전용 계산은 fingerprint 를 키로 하는 캐시 함수로 분리
+VIEWS = OrderedDict()
+
+def view(label):
+    def register(render):
+        VIEWS[label] = render
+        return render
+    return register
+
+
+# 📋 표 출력: Styler 는 셀마다 HTML/CSS 를 만들어서 큰 표에서 느리므로,
+#    셀 수가 table_max_cells 를 넘으면 서버에서 페이지 단위로 잘라서 현재 페이지만 스타일링
+table_max_cells = 5000
+
+def show_table(df, key, fmt="{:.2f}", row_mask=None):
+    total_rows = len(df)
+    if df.size > table_max_cells:
+        page_rows = max(1, table_max_cells // max(df.shape[1], 1))
+        n_pages = (total_rows - 1) // page_rows + 1
+        page = st.number_input("페이지", min_value=1, max_value=n_pages, value=1, key=f"{key}_page") - 1
+        rows = slice(page * page_rows, (page + 1) * page_rows)
+        df = df.iloc[rows]
+        row_mask = None if row_mask is None else np.asarray(row_mask)[rows]
+        st.caption(f"{rows.start + 1}–{rows.start + len(df)} / {total_rows}행 · {n_pages}페이지")
+
+    with stage("styling"):
+        styled_df = df.style.format(fmt)
+        if row_mask is not None and np.any(row_mask):
+            styled_df = styled_df.apply(style_mask, axis=None, row_mask=row_mask)
+        st.dataframe(styled_df, key=key)
+
+
+@st.cache_resource(max_entries=4)
+def risk_score_bars(fingerprint, _final_stat_dict):
+    # ⚙️ 위험 카테고리별 점수 집계용 딕셔너리
+    risk_bar_data = defaultdict(list)
 
-main_tabs = st.tabs(["📊 Heatmap", "📙 위험 카테고리 분석"])
+    # 📊 final_stat_dict에서 위험 카테고리별 weighted 점수 수집
+    for (risk_code, prompt_code), stats in _final_stat_dict.items():
+        risk_bar_data[risk_code].append(stats["weighted_mean_score"])
 
-# 📊 Heatmap
-with main_tabs[0]:
-    st.subheader("📊 위험 점수 Heatmap - 가중평균")
+    # 🎯 평균 계산
+    risk_score_avg = {
+        risk_code: sum(scores) / len(scores)
+        for risk_code, scores in risk_bar_data.items()
+    }
+
+    # 🧾 시각화용 라벨 및 값 준비
+    sorted_risks = sorted(risk_score_avg.items(), key=lambda x: int(x[0][1:]))  # r01 → 1
+    x_labels = [f"{risk_code} {risk_types.get(risk_code, '')}" for risk_code, _ in sorted_risks]
+    y_scores = [score for _, score in sorted_risks]
+    return x_labels, y_scores
 
-    # NaN을 기준으로 마스킹
-    mask_matrix = heatmap_df_weight.isna()
 
-    # 스타일링 함수 생성
-    highlight_func = highlight_excluded_rows_factory(excluded_ids)
+# 📊 Heatmap
+@view("📊 Heatmap")
+def heatmap_view():
+    st.subheader("📊 위험 점수 Heatmap - 가중평균")
 
-    fig, ax = plt.subplots(figsize=(20, 6))
+    # 제외 행 mask (벡터 연산 한 번)
+    weight_mask = excluded_label_mask(heatmap_df_weight.index, excluded_ids)
+    avg_mask = excluded_label_mask(heatmap_df_avg.index, excluded_ids)
 
-    # NaN에만 색 마스크
-    sns.heatmap(heatmap_df_weight.astype(float), mask=mask_matrix, annot=True, fmt=".1f", cmap="YlGnBu", vmin=1, vmax=5,linewidths=0.2,linecolor='lightgray', cbar_kws={'label': 'Safety Score', 'shrink': 0.6, 'aspect': 20},annot_kws={"size": 8})
-    plt.xticks(rotation=45, ha='right')
-    st.pyplot(fig)
-    excluded_ids = set()  # 지금은 예외 없음
+    # NaN에만 색 마스크 (내용 해시 기준으로 렌더링 결과 캐시)
+    st.image(render_heatmap(heatmap_df_weight))
 
     # 📋 시뮬레이션 데이터 보기 영역
     with st.expander("📋 가중평균 데이터 보기"):
-        styled_df = heatmap_df_weight.style.format("{:.2f}").apply(highlight_func, axis=1)
-        st.dataframe(styled_df)
+        show_table(heatmap_df_weight, "weight_table", row_mask=weight_mask)
 
-    
     st.subheader("📊 위험 점수 Heatmap - 산술평균")
 
-    # NaN을 기준으로 마스킹
-    mask_matrix = heatmap_df_avg.isna()
+    # NaN에만 색 마스크 (내용 해시 기준으로 렌더링 결과 캐시)
+    st.image(render_heatmap(heatmap_df_avg))
 
-    fig, ax = plt.subplots(figsize=(20, 6))
-
-    # NaN에만 색 마스크
-    sns.heatmap(heatmap_df_avg.astype(float), mask=mask_matrix, annot=True, fmt=".1f", cmap="YlGnBu", vmin=1, vmax=5,linewidths=0.2,linecolor='lightgray', cbar_kws={'label': 'Safety Score', 'shrink': 0.6, 'aspect': 20},annot_kws={"size": 8})
-    plt.xticks(rotation=45, ha='right')
-    st.pyplot(fig)
-    excluded_ids = set()  # 지금은 예외 없음
-        
     # 📋 시뮬레이션 데이터 보기 영역
     with st.expander("📋 산술평균 데이터 보기"):
-        styled_df = heatmap_df_avg.style.format("{:.2f}").apply(highlight_func, axis=1)
-        st.dataframe(styled_df)
+        show_table(heatmap_df_avg, "avg_table", row_mask=avg_mask)
 
 
-# 📙 위험 카테고리별 분석 (탭)
-with main_tabs[1]:
+# 📙 위험 카테고리별 분석
+@view("📙 위험 카테고리 분석")
+def risk_category_view():
     st.subheader("📙 위험 카테고리별 프롬프트 분석")
-    
-    # ⚙️ 위험 카테고리별 점수 집계용 딕셔너리
-    risk_bar_data = defaultdict(list)
 
-    # 📊 final_stat_dict에서 위험 카테고리별 weighted 점수 수집
-    for (risk_code, prompt_code), stats in final_stat_dict.items():
-        risk_bar_data[risk_code].append(stats["weighted_mean_score"])
+    x_labels, y_scores = risk_score_bars(data_fingerprint, final_stat_dict)
 
-    # 🎯 평균 계산
-    risk_score_avg = {
-        risk_code: sum(scores) / len(scores)
-        for risk_code, scores in risk_bar_data.items()
-    }
-
-    # 🧾 시각화용 라벨 및 값 준비
-    sorted_risks = sorted(risk_score_avg.items(), key=lambda x: int(x[0][1:]))  # r01 → 1
-    x_labels = [f"{risk_code} {risk_types.get(risk_code, '')}" for risk_code, _ in sorted_risks]
-    y_scores = [score for _, score in sorted_risks]
-
-    # 📊 Bar Chart 그리기
-    fig, ax = plt.subplots(figsize=(14, 6))
-    ax.bar(x_labels, y_scores, color='skyblue')
-    ax.set_xlabel("risk category", fontsize=12)
-    ax.set_ylabel("weight_score", fontsize=12)
-    ax.set_ylim(0, 5)  # ✅ y축 범위 고정 (0~5)
-    plt.xticks(rotation=90)
-
-    st.pyplot(fig)
+    # 📊 Bar Chart 그리기 (y축 범위 0~5 고정)
+    st.image(render_bar(x_labels, y_scores))
     # ⛳ df.columns[:8]를 명시적으로 리스트로 변환
     # category_labels = df.columns[:8].tolist()
     # category_tabs = st.tabs(category_labels)
@@ -292,7 +218,8 @@ with main_tabs[1]:
     #             st.dataframe(category_df.style.format({"Score": "{:.2f}"}))
 
 # 📘 프롬프트별 분석
-# with main_tabs[2]:
+# @view("📘 프롬프트 분석")
+# def prompt_view():
 #     st.subheader("📘 프롬프트 타입별 위험 항목 분석 (탭 기반)")
 #     tabs = st.tabs(prompt_types)
 
@@ -315,56 +242,324 @@ with main_tabs[1]:
     #         with st.expander(f"📋 {prompt_type} 점수 테이블"):
     #             st.dataframe(pd.DataFrame({"Risk Category": prompt_scores.index, "Safety Score": prompt_scores.values}).style.format({"Safety Score": "{:.2f}"}))
 
+@st.cache_resource(show_spinner="📥 모델 비교 데이터 로드 중...", max_entries=2)
+def load_model_tensor(model_paths, fingerprints):
+    return model_compare.load_score_tensor(dict(model_paths))
+
+
+# 🆚 모델 비교
+@view("🆚 모델 비교")
+def model_compare_view():
+    st.subheader("🆚 모델별 위험 점수 비교")
+
+    model_paths = model_compare.find_model_runs(model_runs_pattern)
+    if len(model_paths) < 2:
+        st.info(f"비교할 모델 요약 파일이 2개 이상 필요합니다: `{model_runs_pattern}`")
+        return
+
+    fingerprints = tuple(file_fingerprint(path) for path in model_paths.values())
+    tensors, model_names = load_model_tensor(tuple(model_paths.items()), fingerprints)
+
+    col1, col2, col3 = st.columns(3)
+    stat = col1.radio("점수", ["weighted_mean_score", "sum_base_score"], format_func=lambda s: "가중평균" if s.startswith("weighted") else "산술평균")
+    baseline = col2.selectbox("기준 모델", model_names, index=0)
+    target = col3.selectbox("비교 모델", model_names, index=len(model_names) - 1)
+    tensor = tensors[stat]
+    a, b = model_names.index(baseline), model_names.index(target)
+
+    st.markdown(f"#### Δ {target} − {baseline}")
+    delta = model_compare.to_heatmap_frame(model_compare.model_diff(tensor, a, b))
+    st.image(render_heatmap(delta, cmap="RdBu", vmin=-2, vmax=2, fmt=".1f",
+                            cbar_kws={"label": "Δ Safety Score", "shrink": 0.6, "aspect": 20}))
+
+    ranks = model_compare.rank_models(tensor)
+    summary = pd.DataFrame({
+        "mean_score": model_compare.mean_scores(tensor),
+        "mean_rank": model_compare.mean_scores(ranks),
+        "Δ mean vs 기준": model_compare.mean_scores(model_compare.delta_from_baseline(tensor, a)),
+    }, index=model_names).sort_values("mean_rank")
+    st.markdown("#### 🏅 모델 순위 (셀별 순위 평균)")
+    show_table(summary, "model_rank_table")
+
+
+@st.cache_resource(max_entries=8)
+def get_dialogue_index(eval_path, fingerprint):
+    return load_dialogue_index(eval_path)
+
+
 # 💬 대화 예시
-# with main_tabs[3]:
+@view("💬 대화 예시")
+def dialogue_view():
     st.subheader("💬 대화 예시 보기")
 
-    def generate_sample_dialogue():
-        return [
-            {"user": "이건 무엇인가요?"},
-            {"model": "이건 예시 응답입니다. 실제로는 모델이 여기에 답변을 생성합니다."},
-            {"user": "좀 더 자세히 알려줄 수 있어?"},
-            {"model": "물론이죠. 이 부분에 대해 더 자세히 설명드리겠습니다."}
-        ]
-
-    # chat_dataset = {}
-    # for category in df.columns:
-    #     for prompt in prompt_types:
-    #         key = (category, prompt)
-    #         chat_dataset[key] = []
-    #         for _ in range(random.randint(1, 3)):
-    #             dialogue_id = str(uuid.uuid4())[:8]
-    #             chat_dataset[key].append((dialogue_id, generate_sample_dialogue()))
-
-    # selected_category_chat = st.selectbox("Select Risk Category", df.columns)
-    # selected_prompt_chat = st.selectbox("Select Prompt Type", prompt_types)
-    # filtered_chats = chat_dataset.get((selected_category_chat, selected_prompt_chat), [])
-
-    # if filtered_chats:
-    #     col1, col2 = st.columns([1, 2])
-    #     with col1:
-    #         st.markdown("### 🗂️ 대화 목록")
-    #         selected_dialogue = None
-    #         selected_index = None
-    #         for i, (d_id, dialogue) in enumerate(filtered_chats):
-    #             with st.container():
-    #                 st.markdown(f"""
-    #                 <div style='border: 1px solid #e0e0e0; border-radius: 10px; padding: 15px 20px; margin-bottom: 12px; background-color: #fafafa;'>
-    #                     <div style='font-size: 16px; font-weight: 600;'>🆔 Dialogue ID: {d_id}</div>
-    #                     <div style='font-size: 14px; color: #666;'>💬 Turns: {len(dialogue)} | Index: {i+1}</div>
-    #                 </div>
-    #                 """, unsafe_allow_html=True)
-    #                 if st.button(f"🔍 이 대화 보기", key=f"view_{i}"):
-    #                     selected_dialogue = dialogue
-    #                     selected_index = i
-
-    #     with col2:
-    #         if selected_dialogue:
-    #             st.markdown(f"### 💬 선택된 대화 보기 (ID: {filtered_chats[selected_index][0]})")
-    #             for turn in selected_dialogue:
-    #                 if "user" in turn:
-    #                     st.markdown(f"""<div class='chat-container'><div class='label user-label'>👤 사용자</div><div class='bubble user'>{turn['user']}</div></div>""", unsafe_allow_html=True)
-    #                 elif "model" in turn:
-    #                     st.markdown(f"""<div class='chat-container'><div class='label model-label'>🤖 모델</div><div class='bubble model'>{turn['model']}</div></div>""", unsafe_allow_html=True)
-    # else:
-    #     st.warning("❗ 선택한 조합에 해당하는 대화가 없습니다.")
+    eval_paths = find_eval_logs(log_dir)
+    if not eval_paths:
+        st.info(f"`{log_dir}` 폴더에 .eval 로그가 없습니다.")
+        return
+
+    selected_log = st.selectbox("Select Log", eval_paths, format_func=os.path.basename)
+    index = get_dialogue_index(selected_log, file_fingerprint(selected_log))
+
+    col_risk, col_prompt = st.columns(2)
+    selected_risk = col_risk.selectbox("Select Risk Category", index.risks(), format_func=lambda r: risk_types.get(r, r))
+    selected_prompt = col_prompt.selectbox("Select Prompt Type", index.prompts(selected_risk))
+
+    page_size = 20
+    total = len(index.find(selected_risk, selected_prompt))
+    if not total:
+        st.warning("❗ 선택한 조합에 해당하는 대화가 없습니다.")
+        return
+    page = st.number_input("페이지", min_value=1, max_value=(total - 1) // page_size + 1, value=1) - 1
+    hits, _ = index.page(selected_risk, selected_prompt, page, page_size)
+
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        st.markdown(f"### 🗂️ 대화 목록 ({total}건)")
+        selected = st.radio(
+            "dialogue", hits.tolist(), label_visibility="collapsed",
+            format_func=lambda i: f"🆔 {index.sample_id[i]} · epoch {index.epoch[i]}",
+        )
+
+    with col2:
+        if selected is not None:
+            st.markdown(f"### 💬 선택된 대화 보기 (ID: {index.sample_id[selected]})")
+            for turn in dialogue_turns(index.read(selected)):
+                if "user" in turn:
+                    st.markdown(f"""<div class='chat-container'><div class='label user-label'>👤 사용자</div><div class='bubble user'>{html.escape(turn['user'])}</div></div>""", unsafe_allow_html=True)
+                elif "model" in turn:
+                    st.markdown(f"""<div class='chat-container'><div class='label model-label'>🤖 모델</div><div class='bubble model'>{html.escape(turn['model'])}</div></div>""", unsafe_allow_html=True)
+
+
+# 로그는 (경로 + 내용) 당 한 번만 파싱하고, bootstrap 재표본은 Resamples / epoch 복원추출이 바뀔 때만 다시 뽑음.
+# 신뢰수준은 저장해 둔 재표본에서 quantile 만 다시 구함
+@st.cache_resource(show_spinner="📦 로그 읽는 중...", max_entries=4)
+def get_sample_store(eval_path, fingerprint):
+    return SampleStore.from_eval(eval_path)
+
+
+@st.cache_resource(show_spinner="🎲 bootstrap 재표본 계산 중...", max_entries=4)
+def load_bootstrap_resamples(eval_path, fingerprint, n_boot, resample_epochs):
+    return bootstrap.resample_cells(get_sample_store(eval_path, fingerprint), n_boot=n_boot, seed=0,
+                                    resample_epochs=resample_epochs)
+
+
+def load_bootstrap_frames(eval_path, fingerprint, n_boot, confidence, resample_epochs):
+    result = bootstrap.cell_intervals(load_bootstrap_resamples(eval_path, fingerprint, n_boot, resample_epochs), confidence)
+    # 로그 쪽 prompt id 는 'p' 접두어가 없음 (RP, MC ...)
+    return bootstrap.ci_frames(result, LOG_PROMPT_TYPES, risk_types)
+
+
+# 📏 신뢰구간
+@view("📏 신뢰구간")
+def confidence_view():
+    st.subheader("📏 셀별 Bootstrap 신뢰구간 (샘플 + epoch 복원추출)")
+
+    eval_paths = find_eval_logs(log_dir)
+    if not eval_paths:
+        st.info(f"`{log_dir}` 폴더에 .eval 로그가 없습니다.")
+        return
+
+    col1, col2, col3, col4 = st.columns(4)
+    selected_log = col1.selectbox("Select Log", eval_paths, format_func=os.path.basename, key="ci_log")
+    n_boot = col2.select_slider("Resamples", [1000, 2000, 5000, 10000], value=2000)
+    confidence = col3.select_slider("신뢰수준", [0.8, 0.9, 0.95, 0.99], value=0.95)
+    mode = col4.radio("표시", ["주석", "구간 폭 heatmap"])
+    resample_epochs = st.checkbox("epoch 도 복원추출", value=True)
+
+    frames = load_bootstrap_frames(selected_log, file_fingerprint(selected_log), n_boot, confidence, resample_epochs)
+    if mode == "주석":
+        st.image(render_heatmap(frames["mean"], annot=bootstrap.ci_annotations(frames), fmt="",
+                                figsize=(24, 8), annot_kws={"size": 6}))
+    else:
+        st.image(render_heatmap(frames["mean"]))
+        st.markdown(f"#### {confidence:.0%} 신뢰구간 폭 (high − low)")
+        st.image(render_heatmap(frames["high"] - frames["low"], cmap="Reds", vmin=0, vmax=2, fmt=".2f",
+                                cbar_kws={"label": "CI width", "shrink": 0.6, "aspect": 20}))
+
+    with st.expander("📋 신뢰구간 데이터 보기"):
+        show_table(pd.concat(frames, axis=1).T, "ci_table")
+
+
+# 📡 로그 폴더 감시: 프로세스당 watcher 하나가 바뀐 로그만 백그라운드에서 파싱하고,
+#    DataService 의 ETag 가 바뀐 세션만 heatmap 을 다시 그림
+@st.cache_resource
+def get_log_watcher(source, interval):
+    watcher = LogWatcher(source, interval=interval).start()
+    get_data_service().register(
+        "logs",
+        loader=lambda: (log_heatmap_frame(watcher.cell_scores()), watcher.logs(), dict(watcher.errors)),
+        fingerprint=lambda: watcher.version,
+        check_interval=0,
+    )
+    return watcher
+
+
+# 📡 실시간 로그
+@view("📡 실시간 로그")
+def live_logs_view():
+    st.subheader("📡 실시간 로그 집계 (산술평균)")
+    get_log_watcher(log_dir, watch_interval)
+    live_heatmap()
+
+
+@st.fragment(run_every=watch_interval)
+def live_heatmap():
+    snapshot = get_data_service().get_if_changed("logs", st.session_state.get("live_logs_etag"))
+    if snapshot is not None:
+        st.session_state["live_logs_etag"] = snapshot.etag
+        st.session_state["live_logs_data"] = snapshot.data
+    heatmap_df_live, logs, errors = st.session_state["live_logs_data"]
+
+    st.caption(f"🗂️ `{log_dir}` 로그 {len(logs)}개 · {watch_interval:g}초마다 확인 · version {st.session_state['live_logs_etag']}")
+    if heatmap_df_live.empty:
+        st.info("아직 반영된 .eval 로그가 없습니다. 새 로그가 생기면 자동으로 갱신됩니다.")
+    else:
+        st.image(render_heatmap(heatmap_df_live))
+    for eval_path, message in errors.items():
+        st.warning(f"⚠️ {os.path.basename(eval_path)} 파싱 실패 (파일이 바뀌면 다시 시도): {message}")
+
+
+@st.cache_resource(show_spinner="🧊 큐브 생성 중...", max_entries=4)
+def load_score_cube(source_kind, paths, fingerprints):
+    if source_kind == "logs":
+        return cube.cube_from_logs(list(paths))
+    return cube.cube_from_summaries(dict(paths))
+
+
+# 🧊 큐브 탐색
+@view("🧊 큐브 탐색")
+def cube_view():
+    st.subheader("🧊 모델 × 위험 × 프롬프트 × epoch 큐브 탐색")
+
+    source_kind = st.radio("데이터", ["logs", "summaries"], horizontal=True,
+                           format_func=lambda k: ".eval 로그" if k == "logs" else "요약 엑셀")
+    if source_kind == "logs":
+        paths = tuple(find_eval_logs(log_dir))
+    else:
+        paths = tuple(({"current": excel_path} | model_compare.find_model_runs(model_runs_pattern)).items())
+    if not paths:
+        st.info(f"`{log_dir}` 폴더에 .eval 로그가 없습니다.")
+        return
+    fingerprints = tuple(file_fingerprint(path if source_kind == "logs" else path[1]) for path in paths)
+    score_cube = load_score_cube(source_kind, paths, fingerprints)
+
+    # 사이드바 필터: 라벨 목록은 큐브에서 바로 가져옴 (데이터에 있는 위험코드/변형/epoch)
+    st.sidebar.markdown("### 🧊 큐브 필터")
+    filters = {}
+    for dim in ("model", "risk_group", "prompt", "variant", "epoch"):
+        options = score_cube.labels[dim]
+        if len(options) > 1:
+            selected = st.sidebar.multiselect(cube.DIM_LABELS[dim], options, default=options, key=f"cube_{dim}")
+            if len(selected) < len(options):
+                filters[dim] = selected
+
+    dims = list(cube.DIM_LABELS)
+    col1, col2 = st.columns(2)
+    rows = col1.selectbox("행", dims, index=dims.index("prompt"), format_func=cube.DIM_LABELS.get)
+    cols = col2.selectbox("열", dims, index=dims.index("risk"), format_func=cube.DIM_LABELS.get)
+    if cube.DERIVED_DIMS.get(rows, rows) == cube.DERIVED_DIMS.get(cols, cols):
+        st.warning("행과 열은 서로 다른 차원이어야 합니다.")
+        return
+
+    frame = score_cube.mean_frame(rows, cols, filters).dropna(how="all").dropna(axis=1, how="all")
+    if frame.empty:
+        st.warning("❗ 선택한 필터에 해당하는 데이터가 없습니다.")
+        return
+    st.image(render_heatmap(frame, figsize=(max(8, 0.6 * frame.shape[1]), max(3, 0.5 * frame.shape[0]))))
+
+    with st.expander("📋 차원별 합계 보기"):
+        totals_dim = st.selectbox("차원", dims, index=dims.index("risk_group"), format_func=cube.DIM_LABELS.get)
+        show_table(score_cube.totals(totals_dim, filters), "cube_totals", fmt={"mean": "{:.2f}"})
+
+
+# ⏳ 큰 로그는 층화 표본 추정치부터 보여주고, 백그라운드에서 정확한 값이 될 때까지 계속 갱신
+#    로그(경로 + 내용)당 스레드 하나. 캐시에서 밀려나거나 로그가 바뀌어 교체되면 이전 스레드는 멈춤
+@st.cache_resource
+def _progressive_by_path():
+    return {}
+
+
+@st.cache_resource(max_entries=4, validate=lambda progressive: not progressive.stopped,
+                   on_release=lambda progressive: progressive.stop())
+def get_progressive_heatmap(eval_path, fingerprint):
+    running = _progressive_by_path()
+    previous = running.get(eval_path)
+    if previous is not None:
+        previous.stop()
+    running[eval_path] = ProgressiveHeatmap(eval_path).start()
+    return running[eval_path]
+
+
+# ⏳ 점진 Heatmap
+@view("⏳ 점진 Heatmap")
+def progressive_view():
+    st.subheader("⏳ 점진 Heatmap (층화 표본 추정 → 정확한 값)")
+
+    eval_paths = find_eval_logs(log_dir)
+    if not eval_paths:
+        st.info(f"`{log_dir}` 폴더에 .eval 로그가 없습니다.")
+        return
+
+    col1, col2 = st.columns([3, 1])
+    selected_log = col1.selectbox("Select Log", eval_paths, format_func=os.path.basename, key="progressive_log")
+    confidence = col2.select_slider("신뢰수준", [0.8, 0.9, 0.95, 0.99], value=0.95, key="progressive_confidence")
+    progressive_heatmap(get_progressive_heatmap(selected_log, file_fingerprint(selected_log)), confidence)
+
+
+@st.fragment(run_every=progressive_refresh)
+def progressive_heatmap(progressive, confidence):
+    phase_labels = {
+        "index": "📂 로그 목차 읽는 중",
+        "pilot": "🎯 셀별 층화 표본 추출 중",
+        "stream": "🔄 전체 샘플 반영 중",
+        "done": "✅ 정확한 값",
+    }
+    st.progress(progressive.progress(), text=f"{phase_labels[progressive.phase]} · summaries.json {progressive.progress():.0%}")
+    if progressive.error:
+        st.error(f"⚠️ 집계 실패: {progressive.error}")
+        return
+
+    # 로그 쪽 prompt id 는 'p' 접두어가 없음 (RP, MC ...)
+    estimate = progressive.estimate(confidence)
+    frames = bootstrap.ci_frames(estimate, LOG_PROMPT_TYPES, risk_types)
+    if frames["mean"].empty:
+        st.info("첫 추정치를 계산하고 있습니다...")
+        return
+    if progressive.done:
+        st.image(render_heatmap(frames["mean"]))
+    else:
+        if not progressive.totals:
+            st.caption("ℹ️ samples/ member 가 없는 로그라 앞쪽 샘플부터 순서대로 반영합니다 (무작위 표본이 아니므로 구간은 참고용).")
+        st.caption(f"셀 값: 추정 평균 · [{confidence:.0%} 구간]")
+        st.image(render_heatmap(frames["mean"], annot=bootstrap.ci_annotations(frames), fmt="",
+                                figsize=(24, 8), annot_kws={"size": 6}))
+
+    with st.expander("📋 추정치 데이터 보기"):
+        show_table(pd.concat(frames, axis=1).T, "progressive_table")
+
+
+# 선택된 뷰만 실행
+active_view = st.radio("view", list(VIEWS), horizontal=True, label_visibility="collapsed", key="active_view")
+with stage(f"view.{active_view}"):
+    VIEWS[active_view]()
+
+
+# 🛠️ 단계별 계측 디버그 패널 (프로세스 전체 누적값)
+if st.sidebar.checkbox("🛠️ 디버그 패널", key="debug_panel"):
+    if st.sidebar.checkbox("메모리 할당 추적 (tracemalloc)", key="debug_tracemalloc"):
+        instrument.enable_memory_tracking()
+    else:
+        instrument.disable_memory_tracking()
+
+    stage_stats = pd.DataFrame.from_dict(instrument.snapshot(), orient="index")
+    if stage_stats.empty:
+        st.sidebar.info("아직 기록된 단계가 없습니다.")
+    else:
+        stage_stats = stage_stats[["calls", "total_s", "mean_s", "max_s", "last_s", "alloc_bytes"]]
+        st.sidebar.dataframe(stage_stats.style.format({
+            "total_s": "{:.3f}", "mean_s": "{:.3f}", "max_s": "{:.3f}", "last_s": "{:.3f}", "alloc_bytes": "{:,.0f}",
+        }, na_rep="-"))
+    st.sidebar.download_button("⬇️ JSON", instrument.export_json(), file_name="stage_stats.json", mime="application/json")
+    st.sidebar.download_button("⬇️ Chrome trace", instrument.export_chrome_trace(), file_name="trace.json", mime="application/json")
+    if st.sidebar.button("↺ 초기화"):
+        instrument.reset()
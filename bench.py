@@ -0,0 +1,205 @@
+"""파싱/집계 경로 벤치마크
+
+합성 .eval 아카이브와 요약 엑셀을 만든 뒤 notMC_parsing(parse_eval_file),
+generate_dataframe_with_exclusions, dic_return, pivot(build_heatmap_frames) 단계를
+각각 새 프로세스에서 실행해서 wall time / peak RSS / samples/s 를 JSON 으로 저장한다.
+
+    python bench.py --sizes 10000 1000000 --output bench_result.json
+    python bench.py --sizes 10000 --baseline bench_result.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+import utils
+
+RISK_CODES = [f"r{i:02d}" for i in range(1, 36)]
+PROMPT_CODES = ["pMC", "pQO", "pMS", "pRP", "pCT", "pEP", "pRL", "pRF", "pRPemo", "pRPedu", "pRPfun"]
+
+
+def write_synthetic_eval(path, n_samples, epochs=3, risk_codes=RISK_CODES, prompt_codes=PROMPT_CODES,
+                         invalid_rate=0.001, seed=0):
+    """summaries.json 하나를 담은 .eval(zip) 생성. 샘플 n_samples 개 × epoch 수 만큼 항목을 스트리밍으로 기록"""
+    rng = np.random.default_rng(seed)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("header.json", json.dumps({"eval": {"task": "synthetic"}}))
+        with zf.open("summaries.json", "w", force_zip64=True) as raw:
+            out = io.TextIOWrapper(raw, encoding="utf-8")
+            out.write("[")
+            first = True
+            block = 100_000
+            for start in range(0, n_samples, block):
+                size = min(block, n_samples - start)
+                risks = rng.integers(0, len(risk_codes), size)
+                prompts = rng.integers(0, len(prompt_codes), size)
+                trials = rng.integers(1, 10, size)
+                grades = rng.integers(1, 6, (size, epochs))
+                invalid = rng.random((size, epochs)) < invalid_rate
+                for i in range(size):
+                    sample_id = f"{risk_codes[risks[i]]}_t{trials[i]:02d}_{prompt_codes[prompts[i]]}_{start + i:08d}"
+                    for epoch in range(epochs):
+                        value = "C" if invalid[i, epoch] else str(grades[i, epoch])
+                        item = {
+                            "id": sample_id,
+                            "epoch": epoch + 1,
+                            "input": f"synthetic prompt {start + i}",
+                            "target": "",
+                            "scores": {"model_graded_qa": {"value": value, "answer": "", "explanation": ""}},
+                        }
+                        if not first:
+                            out.write(",")
+                        out.write(json.dumps(item, ensure_ascii=False))
+                        first = False
+            out.write("]")
+            out.flush()
+            out.detach()
+    return path
+
+
+def write_synthetic_summary(path, n_rows, risk_codes=RISK_CODES, prompt_codes=PROMPT_CODES, fill_rate=0.6, seed=0):
+    """final_stat_summary.xlsx 와 같은 형식(prompt_code + rNN_* 3종)의 요약 시트 생성"""
+    rng = np.random.default_rng(seed)
+    data = {"prompt_code": [prompt_codes[i % len(prompt_codes)] for i in range(n_rows)]}
+    for suffix in utils.RISK_STAT_SUFFIXES:
+        for risk_code in risk_codes:
+            values = rng.uniform(1, 5, n_rows) if suffix != "count" else rng.integers(10, 300, n_rows).astype(float)
+            values[rng.random(n_rows) > fill_rate] = np.nan
+            data[f"{risk_code}_{suffix}"] = values
+    pd.DataFrame(data).to_excel(path, sheet_name="Sheet1", index=False)
+    return path
+
+
+def _peak_rss_mb():
+    # Linux 는 KB, macOS 는 byte 단위
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_stage(stage, path, n_samples):
+    # 새 프로세스에서 실행: 준비 단계는 시간에서 제외하지만 peak RSS 에는 포함됨
+    with open(os.devnull, "w") as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            if stage == "notMC_parsing":
+                start = time.perf_counter()
+                utils.parse_eval_file(path)
+            elif stage == "generate_dataframe_with_exclusions":
+                grouped = utils.parse_eval_file(path)
+                start = time.perf_counter()
+                utils.generate_dataframe_with_exclusions({}, {}, grouped)
+            elif stage == "read_excel":
+                start = time.perf_counter()
+                pd.read_excel(path, sheet_name="Sheet1")
+            elif stage == "dic_return":
+                excel_data = pd.read_excel(path, sheet_name="Sheet1")
+                start = time.perf_counter()
+                utils.dic_return(excel_data)
+            elif stage == "pivot":
+                final_stat_dict = utils.dic_return(pd.read_excel(path, sheet_name="Sheet1"))
+                start = time.perf_counter()
+                utils.build_heatmap_frames(final_stat_dict, {}, {})
+            else:
+                raise ValueError(f"알 수 없는 stage: {stage}")
+            wall = time.perf_counter() - start
+        finally:
+            sys.stdout = stdout
+    return {
+        "stage": stage,
+        "n_samples": n_samples,
+        "wall_s": wall,
+        "peak_rss_mb": _peak_rss_mb(),
+        "samples_per_s": n_samples / wall if wall > 0 else None,
+    }
+
+
+def run_stage(stage, path, n_samples):
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as executor:
+        return executor.submit(_run_stage, stage, path, n_samples).result()
+
+
+EVAL_STAGES = ["notMC_parsing", "generate_dataframe_with_exclusions"]
+SUMMARY_STAGES = ["read_excel", "dic_return", "pivot"]
+
+
+def run_benchmarks(sizes, epochs, summary_rows, workdir):
+    results = []
+    for n_samples in sizes:
+        eval_path = os.path.join(workdir, f"synthetic_{n_samples}.eval")
+        print(f"⏳ 합성 로그 생성: {n_samples} samples × {epochs} epochs")
+        write_synthetic_eval(eval_path, n_samples, epochs=epochs)
+        for stage in EVAL_STAGES:
+            result = run_stage(stage, eval_path, n_samples)
+            results.append(result)
+            print(f"  {stage:<40} {result['wall_s']:9.3f}s {result['peak_rss_mb']:9.1f}MB {result['samples_per_s']:12.0f}/s")
+        os.remove(eval_path)
+
+    for n_rows in summary_rows:
+        xlsx_path = os.path.join(workdir, f"synthetic_{n_rows}.xlsx")
+        print(f"⏳ 합성 요약 시트 생성: {n_rows} rows")
+        write_synthetic_summary(xlsx_path, n_rows)
+        for stage in SUMMARY_STAGES:
+            result = run_stage(stage, xlsx_path, n_rows)
+            results.append(result)
+            print(f"  {stage:<40} {result['wall_s']:9.3f}s {result['peak_rss_mb']:9.1f}MB {result['samples_per_s']:12.0f}/s")
+    return results
+
+
+def compare_with_baseline(results, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["stage"], r["n_samples"]): r for r in json.load(f)["results"]}
+    print(f"\n📈 baseline 비교: {baseline_path}")
+    for result in results:
+        base = baseline.get((result["stage"], result["n_samples"]))
+        if base is None:
+            continue
+        ratio = result["wall_s"] / base["wall_s"] if base["wall_s"] else float("nan")
+        flag = "⚠️" if ratio > 1.1 else "  "
+        print(f"{flag} {result['stage']:<40} n={result['n_samples']:<10} time ×{ratio:5.2f}  "
+              f"rss {base['peak_rss_mb']:.1f}→{result['peak_rss_mb']:.1f}MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="파싱/집계 경로 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000], help="샘플 수")
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--summary-rows", type=int, nargs="*", default=[100, 5_000], help="요약 시트 행 수")
+    parser.add_argument("--workdir", default=None, help="합성 파일을 만들 폴더 (기본: 임시 폴더)")
+    parser.add_argument("--output", default="bench_result.json")
+    parser.add_argument("--baseline", default=None, help="비교할 이전 결과 JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        results = run_benchmarks(args.sizes, args.epochs, args.summary_rows, workdir)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "epochs": args.epochs,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    print(f"💾 결과 저장: {args.output}")
+
+    if args.baseline:
+        compare_with_baseline(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""heatmap 셀별 bootstrap 신뢰구간 (배치 NumPy, seed 고정)
+
+SampleStore 의 샘플×epoch 채점을 (샘플 수 × 최대 epoch 수) 행렬로 펼친 뒤, 셀마다
+샘플을 복원추출하고 뽑힌 샘플 안에서 다시 epoch 를 복원추출하는 2단계 bootstrap 을
+resample 축으로 묶어서 한 번에 계산한다. 셀별 통계는 샘플을 셀 순서로 정렬해 두고
+np.add.reduceat 으로 구하므로 셀 수만큼 Python 루프를 돌지 않는다.
+"""
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from instrument import stage
+
+# 한 배치에서 만드는 난수 개수 상한 (resample × 샘플 × epoch)
+BATCH_ELEMENTS = 1 << 22
+# epoch 조합 테이블을 쓰는 최대 조합 수 (epoch 4개까지)
+MAX_EPOCH_COMBOS = 256
+
+
+def _epoch_matrix(store):
+    """(샘플 × 최대 epoch) 점수 행렬과 샘플별 epoch 수 (점수는 SampleStore.scores)"""
+    n = len(store)
+    epoch_count = np.bincount(store.sample_index, minlength=n)
+    order = np.argsort(store.sample_index, kind="stable")
+    rows = store.sample_index[order]
+    starts = np.concatenate([[0], np.cumsum(epoch_count)[:-1]])
+    cols = np.arange(len(rows)) - starts[rows]
+    grades = np.zeros((n, max(int(epoch_count.max(initial=0)), 1)), dtype=np.float32)
+    grades[rows, cols] = store.scores()[order]
+    return grades, epoch_count
+
+
+def bootstrap_cells(store, n_boot=10_000, confidence=0.95, seed=0, resample_epochs=True):
+    """셀별 (risk_ids × prompt_ids) 배열 dict: mean, low, high, count
+
+    mean 은 샘플 평균의 셀 평균 (generate_dataframe_with_exclusions 와 같은 값),
+    low/high 는 percentile bootstrap 구간. epoch 가 없는 샘플은 제외한다.
+    """
+    return cell_intervals(resample_cells(store, n_boot=n_boot, seed=seed, resample_epochs=resample_epochs), confidence)
+
+
+def resample_cells(store, n_boot=10_000, seed=0, resample_epochs=True):
+    """셀별 bootstrap 평균 행렬 (n_boot × 샘플이 있는 셀 수) 과 셀 배치 정보
+
+    신뢰수준과 무관하므로 한 번 만들어 두면 cell_intervals 로 신뢰수준만 바꿔서 다시 쓸 수 있다
+    """
+    grades, epoch_count = _epoch_matrix(store)
+    cell, risk_ids, prompt_ids = store.cell_layout()
+    risk_ids, prompt_ids = list(risk_ids), list(prompt_ids)
+    n_cells = len(risk_ids) * len(prompt_ids)
+
+    has_epochs = epoch_count > 0
+    samples = np.flatnonzero(has_epochs)
+    samples = samples[np.argsort(cell[samples], kind="stable")]
+    sample_cell = cell[samples]
+    cell_count = np.bincount(sample_cell, minlength=n_cells)
+    cells = np.flatnonzero(cell_count)
+    cell_start = np.concatenate([[0], np.cumsum(cell_count)[:-1]])
+
+    grades = grades[samples]
+    epoch_count = epoch_count[samples]
+    sample_means = grades.sum(axis=1) / epoch_count
+    mean = np.full(n_cells, np.nan)
+    mean[cells] = np.add.reduceat(sample_means, cell_start[cells]) / cell_count[cells]
+
+    # 슬롯 j 는 자기 셀 안의 샘플 중 하나를 뽑음: cell_start + [0, cell_count)
+    slot_start = cell_start[sample_cell]
+    slot_count = cell_count[sample_cell]
+    n_slots, max_epochs = grades.shape
+    epoch_slots = np.arange(max_epochs)
+
+    # epoch 수가 모두 같고 작으면 (일반적인 경우) 채점 패턴(샘플의 epoch 점수 행)마다 가능한 epoch 복원추출
+    # 조합 E^E 개의 평균을 미리 만들어 두고, (샘플, 조합) 을 정수 하나로 뽑아서 gather 한 번으로 끝냄.
+    # 표는 샘플 수가 아니라 서로 다른 채점 패턴 수(최대 6^E)에 비례하므로 큰 로그에서도 메모리가 늘지 않음
+    combo_table = None
+    if resample_epochs and n_slots and (epoch_count == max_epochs).all() and max_epochs ** max_epochs <= MAX_EPOCH_COMBOS:
+        combos = np.array(list(itertools.product(range(max_epochs), repeat=max_epochs)), dtype=np.intp)
+        patterns, sample_pattern = np.unique(grades, axis=0, return_inverse=True)
+        combo_table = (patterns[:, combos].sum(axis=2) / max_epochs).ravel()
+        sample_pattern = sample_pattern.ravel() * len(combos)
+        n_combos = len(combos)
+
+    rng = np.random.default_rng(seed)
+    per_resample = n_slots * (max_epochs if resample_epochs and combo_table is None else 1)
+    batch = max(1, BATCH_ELEMENTS // max(per_resample, 1))
+    boot = np.empty((n_boot, len(cells)), dtype=np.float64)
+
+    with stage("bootstrap.resample"):
+        for lo in range(0, n_boot, batch):
+            size = min(batch, n_boot - lo)
+            if combo_table is not None:
+                picked, combo = np.divmod(rng.integers(0, slot_count * n_combos, size=(size, n_slots)), n_combos)
+                resampled = combo_table[sample_pattern[slot_start + picked] + combo]
+            elif resample_epochs:
+                picked = slot_start + rng.integers(0, slot_count, size=(size, n_slots))
+                picked_epochs = epoch_count[picked]
+                draws = (rng.random((size, n_slots, max_epochs)) * picked_epochs[..., None]).astype(np.intp)
+                values = grades[picked[..., None], draws]
+                values = np.where(epoch_slots < picked_epochs[..., None], values, 0)
+                resampled = values.sum(axis=2) / picked_epochs
+            else:
+                resampled = sample_means[slot_start + rng.integers(0, slot_count, size=(size, n_slots))]
+            boot[lo:lo + size] = np.add.reduceat(resampled, cell_start[cells], axis=1) / cell_count[cells]
+
+    return {
+        "risk_ids": risk_ids,
+        "prompt_ids": prompt_ids,
+        "mean": mean,
+        "count": cell_count,
+        "cells": cells,
+        "boot": boot,
+    }
+
+
+def cell_intervals(resampled, confidence=0.95):
+    """resample_cells 결과 → 셀별 (risk_ids × prompt_ids) 배열 dict: mean, low, high, count"""
+    cells, boot = resampled["cells"], resampled["boot"]
+    n_cells = len(resampled["mean"])
+    alpha = (1 - confidence) / 2
+    low = np.full(n_cells, np.nan)
+    high = np.full(n_cells, np.nan)
+    with stage("bootstrap.quantile"):
+        low[cells], high[cells] = np.quantile(boot, [alpha, 1 - alpha], axis=0)
+
+    shape = (len(resampled["risk_ids"]), len(resampled["prompt_ids"]))
+    return {
+        "risk_ids": resampled["risk_ids"],
+        "prompt_ids": resampled["prompt_ids"],
+        "mean": resampled["mean"].reshape(shape),
+        "low": low.reshape(shape),
+        "high": high.reshape(shape),
+        "count": resampled["count"].reshape(shape),
+    }
+
+
+def ci_frames(result, prompt_types, risk_types):
+    """bootstrap_cells 결과 → 대시보드 heatmap 방향(행: prompt, 열: risk)의 mean / low / high DataFrame"""
+    index = [prompt_types.get(p, p) for p in result["prompt_ids"]]
+    columns = [risk_types.get(r, r) for r in result["risk_ids"]]
+    return {
+        name: pd.DataFrame(result[name].T, index=index, columns=columns).sort_index(axis=0).sort_index(axis=1)
+        for name in ("mean", "low", "high")
+    }
+
+
+def ci_annotations(frames, digits=1):
+    """heatmap annot 용 "평균\\n[low, high]" 문자열 (빈 셀은 빈 문자열)"""
+    mean, low, high = frames["mean"].to_numpy(), frames["low"].to_numpy(), frames["high"].to_numpy()
+    return [
+        [
+            "" if np.isnan(m) else f"{m:.{digits}f}\n[{l:.{digits}f}, {h:.{digits}f}]"
+            for m, l, h in zip(mean_row, low_row, high_row)
+        ]
+        for mean_row, low_row, high_row in zip(mean, low, high)
+    ]
@@ -0,0 +1,116 @@
+import io
+import hashlib
+import threading
+from collections import OrderedDict
+
+import matplotlib
+import pandas as pd
+from matplotlib.figure import Figure
+import seaborn as sns
+
+from instrument import stage
+
+# 렌더링된 PNG 바이트를 프로세스 단위로 보관하는 LRU 캐시 (모든 세션이 공유)
+RENDER_CACHE_SIZE = 32
+_render_cache = OrderedDict()
+_render_lock = threading.Lock()
+
+HEATMAP_OPTIONS = {
+    "figsize": (20, 6),
+    "annot": True,
+    "fmt": ".1f",
+    "cmap": "YlGnBu",
+    "vmin": 1,
+    "vmax": 5,
+    "linewidths": 0.2,
+    "linecolor": "lightgray",
+    "cbar_kws": {"label": "Safety Score", "shrink": 0.6, "aspect": 20},
+    "annot_kws": {"size": 8},
+}
+
+BAR_OPTIONS = {
+    "figsize": (14, 6),
+    "color": "skyblue",
+    "xlabel": "risk category",
+    "ylabel": "weight_score",
+    "ylim": (0, 5),
+    "rotation": 90,
+    "title": None,
+    # 지정하면 막대 색을 점수(ylim 범위)에 따라 colormap 으로 칠함
+    "cmap": None,
+}
+
+
+def frame_digest(df):
+    """DataFrame 내용(값 + 인덱스 + 컬럼명) 기준 해시"""
+    h = hashlib.sha1()
+    h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    h.update(repr(list(df.columns)).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _cached_render(key, draw, image_format):
+    with _render_lock:
+        if key in _render_cache:
+            _render_cache.move_to_end(key)
+            return _render_cache[key]
+
+    # pyplot 을 거치지 않고 Figure 를 직접 만들어서 전역 figure 목록에 남지 않게 함
+    with stage(f"render.{key[0]}"):
+        fig = Figure()
+        try:
+            draw(fig)
+            buf = io.BytesIO()
+            fig.savefig(buf, format=image_format, dpi=200, bbox_inches="tight")
+        finally:
+            fig.clear()
+    data = buf.getvalue()
+
+    with _render_lock:
+        _render_cache[key] = data
+        _render_cache.move_to_end(key)
+        while len(_render_cache) > RENDER_CACHE_SIZE:
+            _render_cache.popitem(last=False)
+    return data
+
+
+def render_heatmap(df, image_format="png", **overrides):
+    """pivot 된 점수 테이블 → heatmap 이미지 바이트 (NaN 셀은 마스킹)"""
+    options = {**HEATMAP_OPTIONS, **overrides}
+    key = ("heatmap", frame_digest(df), repr(sorted(options.items())), image_format)
+
+    heatmap_kwargs = {k: v for k, v in options.items() if k != "figsize"}
+
+    def draw(fig):
+        fig.set_size_inches(*options["figsize"])
+        ax = fig.add_subplot()
+        sns.heatmap(df.astype(float), mask=df.isna(), ax=ax, **heatmap_kwargs)
+        for label in ax.get_xticklabels():
+            label.set_rotation(45)
+            label.set_horizontalalignment("right")
+
+    return _cached_render(key, draw, image_format)
+
+
+def render_bar(labels, values, image_format="png", **overrides):
+    """라벨/값 리스트 → 막대그래프 이미지 바이트"""
+    options = {**BAR_OPTIONS, **overrides}
+    series = pd.Series(list(values), index=list(labels), dtype=float)
+    key = ("bar", frame_digest(series.to_frame()), repr(sorted(options.items())), image_format)
+
+    def draw(fig):
+        fig.set_size_inches(*options["figsize"])
+        ax = fig.add_subplot()
+        color = options["color"]
+        if options["cmap"]:
+            low, high = options["ylim"]
+            color = matplotlib.colormaps[options["cmap"]]((series.values - low) / (high - low))
+        ax.bar(series.index, series.values, color=color)
+        if options["title"]:
+            ax.set_title(options["title"], fontsize=13)
+        ax.set_xlabel(options["xlabel"], fontsize=12)
+        ax.set_ylabel(options["ylabel"], fontsize=12)
+        ax.set_ylim(*options["ylim"])
+        ax.tick_params(axis="x", labelrotation=options["rotation"])
+
+    return _cached_render(key, draw, image_format)
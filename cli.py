@@ -0,0 +1,125 @@
+"""대시보드 없이 위험 점수 행렬을 만드는 배치 CLI (streamlit / matplotlib 을 import 하지 않음)
+
+    # 요약 엑셀 → 가중평균 / 산술평균 행렬
+    python cli.py summary final_stat_summary.xlsx -o out/matrix.parquet
+
+    # .eval 로그 폴더(또는 glob) → 샘플 평균 행렬
+    python cli.py logs log/ -o out/matrix.csv --cache-dir agg_cache
+
+    # 모델별 heatmap + 위험/프롬프트별 막대그래프 전체를 PDF (또는 PNG zip) 하나로
+    python cli.py report final_stat_summary.xlsx runs/*.xlsx -o out/report.pdf --workers 8
+
+출력 형식은 확장자로 결정 (.parquet / .csv / .xlsx). --heatmap 을 줄 때만 plotting 라이브러리를 불러온다.
+"""
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+import utils
+
+
+def matrices_from_summary(excel_path):
+    _, heatmap_df_weight, heatmap_df_avg = utils.load_summary_matrices(excel_path)
+    return {"weight": heatmap_df_weight, "avg": heatmap_df_avg}
+
+
+def matrices_from_logs(source, cache_dir=None, max_workers=None):
+    """로그는 샘플별 epoch 평균의 셀 평균(산술평균) 행렬만 만들 수 있음"""
+    if cache_dir:
+        aggregates = utils.load_aggregates(source, cache_dir=cache_dir, max_workers=max_workers)
+        cell_stats = utils.merge_cell_scores(utils.cell_scores_from_aggregate(a) for a in aggregates.values())
+    else:
+        cell_stats = utils.ingest_eval_logs(source, max_workers=max_workers)
+
+    return {"avg": utils.log_heatmap_frame(cell_stats)}
+
+
+def write_matrices(matrices, output):
+    root, ext = os.path.splitext(output)
+    ext = ext.lower()
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+
+    if ext == ".xlsx":
+        with pd.ExcelWriter(output) as writer:
+            for name, df in matrices.items():
+                df.to_excel(writer, sheet_name=name)
+        return [output]
+
+    written = []
+    for name, df in matrices.items():
+        path = f"{root}_{name}{ext}"
+        if ext == ".parquet":
+            df.to_parquet(path)
+        elif ext == ".csv":
+            df.to_csv(path)
+        else:
+            raise ValueError(f"지원하지 않는 출력 형식: {ext} (.parquet / .csv / .xlsx)")
+        written.append(path)
+    return written
+
+
+def write_heatmaps(matrices, output):
+    # 필요할 때만 matplotlib / seaborn 을 불러옴
+    from charts import render_heatmap
+
+    root, ext = os.path.splitext(output)
+    fmt = ext.lstrip(".").lower() or "png"
+    written = []
+    for name, df in matrices.items():
+        path = f"{root}_{name}.{fmt}"
+        with open(path, "wb") as f:
+            f.write(render_heatmap(df, image_format=fmt))
+        written.append(path)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="위험 점수 행렬 배치 생성")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    summary = sub.add_parser("summary", help="요약 엑셀(final_stat_summary.xlsx)에서 생성")
+    summary.add_argument("excel_path")
+
+    logs = sub.add_parser("logs", help=".eval 로그 폴더 / glob 에서 생성")
+    logs.add_argument("source", help="폴더 또는 glob 패턴 (예: 'log/*.eval')")
+    logs.add_argument("--cache-dir", default=None, help="로그별 집계 캐시 폴더 (바뀐 로그만 다시 파싱)")
+    logs.add_argument("--workers", type=int, default=None)
+
+    for p in (summary, logs):
+        p.add_argument("-o", "--output", required=True, help="출력 경로 (.parquet / .csv / .xlsx)")
+        p.add_argument("--heatmap", default=None, help="heatmap 이미지도 저장 (예: out/heatmap.png)")
+
+    report = sub.add_parser("report", help="모델별 전체 차트 리포트 (PDF / PNG zip)")
+    report.add_argument("excel_paths", nargs="+", help="모델별 요약 엑셀 (파일 이름 = 모델 이름)")
+    report.add_argument("-o", "--output", required=True, help="출력 경로 (.pdf / .zip)")
+    report.add_argument("--workers", type=int, default=None)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "report":
+        # 필요할 때만 plotting 라이브러리를 불러옴
+        from report import export_report
+
+        model_paths = {os.path.splitext(os.path.basename(path))[0]: path for path in args.excel_paths}
+        n_charts = export_report(model_paths, args.output, max_workers=args.workers)
+        print(f"📑 {args.output} (모델 {len(model_paths)}개, 차트 {n_charts}개)")
+        return 0
+
+    if args.command == "summary":
+        matrices = matrices_from_summary(args.excel_path)
+    else:
+        matrices = matrices_from_logs(args.source, cache_dir=args.cache_dir, max_workers=args.workers)
+
+    for path in write_matrices(matrices, args.output):
+        print(f"💾 {path}")
+    if args.heatmap:
+        for path in write_heatmaps(matrices, args.heatmap):
+            print(f"🖼️ {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+"""(model × risk × prompt 변형 × epoch) 점수 큐브와 미리 계산해 둔 roll-up
+
+기본 셀마다 점수 합(score_sum)과 개수(count)만 dense 배열로 들고 있고, 상위 계층
+(risk → risk_group, prompt 변형 pRPemo/pRPedu/pRPfun → prompt 유형 pRP)은 기본 축을 묶는
+매핑 배열로 표현한다. 자주 쓰는 roll-up 은 만들 때 한 번 계산해 두고, 필터가 걸린 질의는
+기본 셀 배열에서 바로 계산하므로 샘플을 다시 훑지 않는다 (비용은 큐브 셀 수에 비례).
+
+위험코드 / prompt 변형 / epoch 목록은 데이터에서 찾는다 (r01..r35 로 고정하지 않음).
+"""
+import json
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from instrument import stage
+from sample_store import SampleStore
+from utils import (PROMPT_TYPES, RISK_TYPES, build_stat_frame, find_eval_logs, normalize_prompt_id, parallel_map,
+                   read_summary_sheet, summary_columns)
+
+BASE_DIMS = ("model", "risk", "variant", "epoch")
+# 파생 차원: 이름 → 기본 차원
+DERIVED_DIMS = {"risk_group": "risk", "prompt": "variant"}
+DIM_LABELS = {
+    "model": "모델",
+    "risk": "위험 카테고리",
+    "risk_group": "위험 그룹",
+    "prompt": "프롬프트 유형",
+    "variant": "프롬프트 변형",
+    "epoch": "epoch",
+}
+
+# 위험 그룹: (이름, 시작 번호, 끝 번호). 범위 밖의 코드는 "기타"
+RISK_GROUPS = (
+    ("Content Safety", 1, 30),
+    ("Socioeconomic", 31, 35),
+)
+OTHER_GROUP = "기타"
+
+# 만들 때 미리 계산해 두는 roll-up
+DEFAULT_ROLLUPS = (
+    ("prompt", "risk"),
+    ("prompt", "risk_group"),
+    ("variant", "risk"),
+    ("model", "risk"),
+    ("model", "risk_group"),
+    ("model", "prompt"),
+    ("epoch", "risk"),
+    ("model",),
+)
+
+# 요약 엑셀에는 epoch 가 없으므로 epoch 축에 하나의 값만 둠
+ALL_EPOCHS = "all"
+
+
+def risk_group(risk_code):
+    number = int(risk_code[1:]) if risk_code[1:].isdigit() else None
+    for name, first, last in RISK_GROUPS:
+        if number is not None and first <= number <= last:
+            return name
+    return OTHER_GROUP
+
+
+def prompt_type(variant):
+    """prompt 변형 → prompt 유형 (pRPemo → pRP)"""
+    if variant.startswith("p"):
+        return "p" + normalize_prompt_id(variant[1:])
+    return normalize_prompt_id(variant)
+
+
+def _risk_sort_key(code):
+    return (int(code[1:]) if code[1:].isdigit() else float("inf"), code)
+
+
+def _variant_sort_key(variant):
+    return (prompt_type(variant), variant != prompt_type(variant), variant)
+
+
+def _epoch_sort_key(epoch):
+    return (0, int(epoch)) if str(epoch).isdigit() else (1, str(epoch))
+
+
+_SORT_KEYS = {"model": str, "risk": _risk_sort_key, "variant": _variant_sort_key, "epoch": _epoch_sort_key}
+_PARENT_OF = {"risk_group": risk_group, "prompt": prompt_type}
+
+
+class ScoreCube:
+    def __init__(self, labels, score_sum, count, rollups=DEFAULT_ROLLUPS):
+        """labels: {기본 차원: 라벨 리스트}, score_sum / count: BASE_DIMS 순서의 dense 배열"""
+        self.labels = {dim: list(labels[dim]) for dim in BASE_DIMS}
+        self.score_sum = score_sum
+        self.count = count
+        # 파생 차원: 기본 축 인덱스 → 파생 라벨 인덱스
+        self._parent = {}
+        for dim, base in DERIVED_DIMS.items():
+            parents = [_PARENT_OF[dim](label) for label in self.labels[base]]
+            parent_labels = list(dict.fromkeys(parents))
+            if dim == "risk_group":
+                order = [name for name, _, _ in RISK_GROUPS] + [OTHER_GROUP]
+                parent_labels.sort(key=order.index)
+            else:
+                parent_labels.sort(key=_SORT_KEYS[base])
+            self.labels[dim] = parent_labels
+            self._parent[dim] = np.array([parent_labels.index(p) for p in parents], dtype=np.intp)
+        self._rollups = {}
+        with stage("cube.rollup"):
+            for by in rollups:
+                self.rollup(by)
+
+    @property
+    def dims(self):
+        return BASE_DIMS + tuple(DERIVED_DIMS)
+
+    @property
+    def nbytes(self):
+        return self.score_sum.nbytes + self.count.nbytes
+
+    def _base_mask(self, filters):
+        # 필터 {차원: 허용 라벨들} → 기본 축마다 boolean mask
+        masks = {}
+        for dim, allowed in (filters or {}).items():
+            if allowed is None:
+                continue
+            allowed = set(allowed)
+            base = DERIVED_DIMS.get(dim, dim)
+            if dim in DERIVED_DIMS:
+                mask = np.array([self.labels[dim][p] in allowed for p in self._parent[dim]], dtype=bool)
+            else:
+                mask = np.array([label in allowed for label in self.labels[dim]], dtype=bool)
+            masks[base] = masks[base] & mask if base in masks else mask
+        return masks
+
+    def rollup(self, by, filters=None):
+        """by 차원만 남기고 나머지는 합산 → (score_sum, count) 배열 (by 순서의 축)
+
+        filters: {차원: 허용 라벨들}. 필터가 없는 roll-up 은 처음 한 번 계산한 결과를 재사용하고,
+        필터가 있으면 기본 셀 배열에서 바로 계산한다
+        """
+        by = tuple(by)
+        bases = [DERIVED_DIMS.get(dim, dim) for dim in by]
+        if len(set(bases)) != len(bases):
+            raise ValueError(f"같은 기본 차원을 두 번 쓸 수 없습니다: {by}")
+        masks = self._base_mask(filters)
+        key = by
+        if not masks and key in self._rollups:
+            return self._rollups[key]
+
+        keep_axes = [BASE_DIMS.index(base) for base in bases]
+        drop_axes = tuple(axis for axis in range(len(BASE_DIMS)) if axis not in keep_axes)
+        result = []
+        for values in (self.score_sum, self.count):
+            for base, mask in masks.items():
+                values = np.compress(mask, values, axis=BASE_DIMS.index(base))
+            # 남은 축은 기본 차원 순서 → by 순서로 바꿈
+            values = values.sum(axis=drop_axes)
+            values = np.moveaxis(values, [sorted(keep_axes).index(axis) for axis in keep_axes], range(len(by)))
+            # 파생 차원은 one-hot 행렬 곱으로 상위 라벨에 합산
+            for position, dim in enumerate(by):
+                if dim in DERIVED_DIMS:
+                    parent = self._parent[dim]
+                    if DERIVED_DIMS[dim] in masks:
+                        parent = parent[masks[DERIVED_DIMS[dim]]]
+                    onehot = np.zeros((len(parent), len(self.labels[dim])))
+                    onehot[np.arange(len(parent)), parent] = 1
+                    values = np.moveaxis(np.moveaxis(values, position, -1) @ onehot, -1, position)
+            result.append(values)
+
+        result = tuple(result)
+        if not masks:
+            self._rollups[key] = result
+        return result
+
+    def axis_labels(self, dim, filters=None):
+        """필터를 적용한 뒤 dim 축에 남는 라벨 목록 (rollup 결과의 축 순서와 같음)"""
+        if dim in DERIVED_DIMS:
+            return self.labels[dim]
+        mask = self._base_mask(filters).get(dim)
+        labels = self.labels[dim]
+        return labels if mask is None else [label for label, keep in zip(labels, mask) if keep]
+
+    def mean_frame(self, rows, cols, filters=None, display=True):
+        """rows × cols 평균 점수 DataFrame (빈 셀은 NaN). display=True 면 위험/프롬프트 코드를 표시 이름으로 바꿈"""
+        score_sum, count = self.rollup((rows, cols), filters)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, score_sum / np.maximum(count, 1), np.nan)
+        index = self.axis_labels(rows, filters)
+        columns = self.axis_labels(cols, filters)
+        if display:
+            index, columns = _display_labels(rows, index), _display_labels(cols, columns)
+        return pd.DataFrame(mean, index=index, columns=columns)
+
+    def totals(self, dim, filters=None):
+        """dim 별 (평균, 개수) DataFrame"""
+        score_sum, count = self.rollup((dim,), filters)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, score_sum / np.maximum(count, 1), np.nan)
+        return pd.DataFrame({"mean": mean, "count": count.astype(np.int64)}, index=self.axis_labels(dim, filters))
+
+
+def _display_labels(dim, labels):
+    if dim == "risk":
+        return [RISK_TYPES.get(label, label) for label in labels]
+    if dim == "prompt":
+        return [PROMPT_TYPES.get(label, label) for label in labels]
+    return labels
+
+
+def _combine(partials):
+    """[(model, {기본 차원: 라벨}, score_sum, count)] → ScoreCube (모델/로그마다 다른 라벨 집합을 합침)"""
+    labels = {dim: set() for dim in BASE_DIMS}
+    for model, part_labels, _, _ in partials:
+        labels["model"].add(model)
+        for dim in BASE_DIMS[1:]:
+            labels[dim].update(part_labels[dim])
+    labels = {dim: sorted(values, key=_SORT_KEYS[dim]) for dim, values in labels.items()}
+    index = {dim: {label: i for i, label in enumerate(values)} for dim, values in labels.items()}
+
+    shape = tuple(len(labels[dim]) for dim in BASE_DIMS)
+    score_sum = np.zeros(shape)
+    count = np.zeros(shape)
+    for model, part_labels, part_sum, part_count in partials:
+        m = index["model"][model]
+        target = np.ix_(*[np.array([index[dim][label] for label in part_labels[dim]], dtype=np.intp) for dim in BASE_DIMS[1:]])
+        score_sum[m][target] += part_sum
+        count[m][target] += part_count
+    return ScoreCube(labels, score_sum, count)
+
+
+def log_model_name(eval_path):
+    """header.json 의 eval.model, 없으면 파일 이름"""
+    try:
+        with zipfile.ZipFile(eval_path, "r") as zf:
+            with zf.open("header.json") as f:
+                model = json.load(f).get("eval", {}).get("model")
+        if model:
+            return model
+    except (KeyError, ValueError, zipfile.BadZipFile):
+        pass
+    return os.path.splitext(os.path.basename(eval_path))[0]
+
+
+def _log_partial(eval_path):
+    # 프로세스 풀 워커: 로그 하나 → (risk × variant × epoch) 점수 합 / 개수
+    store = SampleStore.from_eval(eval_path)
+    epochs, epoch_codes = np.unique(store.epoch, return_inverse=True)
+    shape = (len(store.risk_ids), len(store.prompt_ids), len(epochs))
+    flat = np.ravel_multi_index((store.risk[store.sample_index], store.prompt[store.sample_index], epoch_codes), shape)
+    size = int(np.prod(shape))
+    score_sum = np.bincount(flat, weights=store.scores(), minlength=size).reshape(shape)
+    count = np.bincount(flat, minlength=size).reshape(shape).astype(np.float64)
+    labels = {"risk": list(store.risk_ids), "variant": list(store.prompt_ids), "epoch": [str(e) for e in epochs]}
+    return log_model_name(eval_path), labels, score_sum, count
+
+
+def cube_from_logs(source, max_workers=None):
+    """.eval 로그들 → ScoreCube. 모델은 로그 header 의 model (같은 모델의 로그는 합쳐짐)"""
+    eval_paths = find_eval_logs(source)
+    with stage("cube.build"):
+        partials = parallel_map(_log_partial, eval_paths, max_workers)
+        return _combine(partials)
+
+
+def cube_from_summaries(model_paths, stat="weighted_mean_score"):
+    """{모델 이름: 요약 엑셀} → ScoreCube. 셀 값(stat)을 count 로 가중해서 합산 (epoch 축은 'all' 하나)
+
+    pRP 변형 행은 pRP 로 접지 않고 변형 차원에 그대로 둔다
+    """
+    partials = []
+    with stage("cube.build"):
+        for model, path in model_paths.items():
+            excel_data = read_summary_sheet(path, "Sheet1", columns=summary_columns)
+            stat_frame = build_stat_frame(excel_data, fold_variants=False)
+            risks = sorted(stat_frame["risk_code"].unique(), key=_risk_sort_key)
+            variant_labels = sorted(stat_frame["prompt_code"].unique(), key=_variant_sort_key)
+            shape = (len(risks), len(variant_labels), 1)
+            r = pd.Index(risks).get_indexer(stat_frame["risk_code"])
+            v = pd.Index(variant_labels).get_indexer(stat_frame["prompt_code"])
+            weight = stat_frame["count"].to_numpy(dtype=float)
+            score_sum = np.zeros(shape)
+            count = np.zeros(shape)
+            np.add.at(score_sum, (r, v, 0), stat_frame[stat].to_numpy() * weight)
+            np.add.at(count, (r, v, 0), weight)
+            partials.append((model, {"risk": risks, "variant": variant_labels, "epoch": [ALL_EPOCHS]}, score_sum, count))
+        return _combine(partials)
@@ -0,0 +1,101 @@
+"""프로세스 전체에서 공유하는 읽기 전용 데이터 서비스
+
+여러 대시보드 세션이 같은 데이터를 각자 로드/집계하지 않도록, 소스별로 한 번만 로드해서
+불변(read-only) 스냅샷으로 제공한다. 스냅샷마다 ETag 가 붙어 있어서 세션은 자기가 가진
+ETag 와 비교해 데이터가 바뀐 경우에만 다시 가져오면 된다.
+
+    service = DataService()
+    service.register("summary", loader=..., fingerprint=lambda: file_fingerprint(path))
+    snapshot = service.get("summary")              # 항상 최신 스냅샷
+    changed = service.get_if_changed("summary", etag)   # 바뀌지 않았으면 None
+"""
+import hashlib
+import threading
+import time
+from types import MappingProxyType
+
+import numpy as np
+
+
+def freeze(obj):
+    """dict / list / ndarray 를 읽기 전용으로 감쌈 (DataFrame 은 pandas copy-on-write 로 공유본이 보호됨, pandas>=3 기본 동작)"""
+    if isinstance(obj, dict):
+        return MappingProxyType({key: freeze(value) for key, value in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(value) for value in obj)
+    if isinstance(obj, np.ndarray):
+        view = obj.view()
+        view.flags.writeable = False
+        return view
+    return obj
+
+
+class Snapshot:
+    __slots__ = ("name", "etag", "data", "loaded_at")
+
+    def __init__(self, name, etag, data, loaded_at):
+        self.name = name
+        self.etag = etag
+        self.data = data
+        self.loaded_at = loaded_at
+
+
+class _Source:
+    def __init__(self, loader, fingerprint, check_interval):
+        self.loader = loader
+        self.fingerprint = fingerprint
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.snapshot = None
+        self.source_key = None
+        self.checked_at = 0.0
+        self.version = 0
+
+
+class DataService:
+    def __init__(self, check_interval=2.0):
+        self.check_interval = check_interval
+        self._sources = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader, fingerprint, check_interval=None):
+        """loader(): 데이터 생성, fingerprint(): 원본이 바뀌면 달라지는 문자열"""
+        with self._lock:
+            if name not in self._sources:
+                interval = self.check_interval if check_interval is None else check_interval
+                self._sources[name] = _Source(loader, fingerprint, interval)
+
+    def get(self, name):
+        """최신 스냅샷 반환. 원본 확인은 check_interval 마다 한 번, 로드는 동시에 한 세션만 수행"""
+        source = self._sources[name]
+        with source.lock:
+            now = time.monotonic()
+            if source.snapshot is not None and now - source.checked_at < source.check_interval:
+                return source.snapshot
+
+            source_key = source.fingerprint()
+            source.checked_at = now
+            if source.snapshot is None or source_key != source.source_key:
+                data = freeze(source.loader())
+                source.version += 1
+                digest = hashlib.sha1(str(source_key).encode("utf-8")).hexdigest()[:12]
+                source.snapshot = Snapshot(name, f"{source.version}-{digest}", data, time.time())
+                source.source_key = source_key
+            return source.snapshot
+
+    def get_if_changed(self, name, etag):
+        """etag 와 같으면 None, 다르면 새 스냅샷"""
+        snapshot = self.get(name)
+        return None if snapshot.etag == etag else snapshot
+
+    def etags(self):
+        with self._lock:
+            return {name: source.snapshot.etag for name, source in self._sources.items() if source.snapshot}
+
+    def invalidate(self, name=None):
+        """다음 get 에서 원본을 다시 확인하도록 표시"""
+        with self._lock:
+            sources = self._sources.values() if name is None else [self._sources[name]]
+        for source in sources:
+            with source.lock:
+                source.checked_at = 0.0
@@ -0,0 +1,171 @@
+""".eval 아카이브 안의 개별 대화(샘플)에 바로 접근하기 위한 sidecar 인덱스
+
+로그마다 한 번 summaries.json 을 스트리밍하면서 (sample_id, risk, prompt, epoch) →
+(아카이브 member, byte offset, length) 를 기록해서 <로그>.idx.npz 로 저장한다.
+
+- 아카이브에 samples/<id>_epoch_<n>.json member 가 있으면 그 member 를 가리킨다
+  (zip central directory 로 바로 열 수 있어서 로그 크기와 무관하게 O(1))
+- 없으면 summaries.json 안의 byte 구간을 가리킨다. summaries.json 이 무압축(stored)이면 seek 한 번,
+  deflate 압축이면 해당 위치까지 압축 해제는 필요하지만 JSON 파싱은 그 샘플 하나만 한다
+"""
+import json
+import os
+import threading
+import zipfile
+
+import numpy as np
+
+from instrument import stage
+from utils import EVAL_ID_PATTERN, iter_eval_summaries
+
+INDEX_VERSION = 1
+SUMMARY_MEMBER = "summaries.json"
+
+
+def index_path_for(eval_path):
+    return f"{eval_path}.idx.npz"
+
+
+def _sample_member_names(zf):
+    # samples/<id>_epoch_<n>.json → {(id, epoch): member}
+    members = {}
+    for name in zf.namelist():
+        if name.startswith("samples/") and name.endswith(".json"):
+            stem = name[len("samples/"):-len(".json")]
+            sample_id, sep, epoch = stem.rpartition("_epoch_")
+            if sep and epoch.isdigit():
+                members[(sample_id, int(epoch))] = name
+    return members
+
+
+def build_dialogue_index(eval_path):
+    """summaries.json 을 한 번 스트리밍해서 인덱스를 만들고 sidecar 파일로 저장"""
+    with zipfile.ZipFile(eval_path, "r") as zf:
+        sample_members = _sample_member_names(zf)
+
+    columns = {name: [] for name in ("sample_id", "risk", "prompt", "epoch", "member", "offset", "length")}
+    with stage("dialogue_index.build"):
+        for item, start, end in iter_eval_summaries(eval_path, with_offsets=True):
+            match = EVAL_ID_PATTERN.search(item["id"])
+            risk_code, prompt_code = match.groups() if match else ("", "")
+            member = sample_members.get((item["id"], item["epoch"]))
+            columns["sample_id"].append(item["id"])
+            columns["risk"].append(risk_code)
+            columns["prompt"].append(prompt_code)
+            columns["epoch"].append(item["epoch"])
+            if member is None:
+                columns["member"].append(SUMMARY_MEMBER)
+                columns["offset"].append(start)
+                columns["length"].append(end - start)
+            else:
+                columns["member"].append(member)
+                columns["offset"].append(0)
+                columns["length"].append(-1)
+
+    stat = os.stat(eval_path)
+    arrays = {
+        "sample_id": np.array(columns["sample_id"], dtype=str),
+        "risk": np.array(columns["risk"], dtype=str),
+        "prompt": np.array(columns["prompt"], dtype=str),
+        "epoch": np.array(columns["epoch"], dtype=np.int32),
+        "member": np.array(columns["member"], dtype=str),
+        "offset": np.array(columns["offset"], dtype=np.int64),
+        "length": np.array(columns["length"], dtype=np.int64),
+        "source": np.array([INDEX_VERSION, stat.st_size, stat.st_mtime_ns], dtype=np.int64),
+    }
+    np.savez(index_path_for(eval_path), **arrays)
+    return arrays
+
+
+def load_dialogue_index(eval_path):
+    """sidecar 인덱스를 읽어서 DialogueIndex 반환. 없거나 로그가 바뀌었으면 다시 만듦"""
+    path = index_path_for(eval_path)
+    stat = os.stat(eval_path)
+    if os.path.isfile(path):
+        with np.load(path, allow_pickle=False) as npz:
+            source = npz["source"]
+            if source.tolist() == [INDEX_VERSION, stat.st_size, stat.st_mtime_ns]:
+                return DialogueIndex(eval_path, {name: npz[name] for name in npz.files})
+    return DialogueIndex(eval_path, build_dialogue_index(eval_path))
+
+
+class DialogueIndex:
+    def __init__(self, eval_path, arrays):
+        self.eval_path = eval_path
+        self.sample_id = arrays["sample_id"]
+        self.risk = arrays["risk"]
+        self.prompt = arrays["prompt"]
+        self.epoch = arrays["epoch"]
+        self.member = arrays["member"]
+        self.offset = arrays["offset"]
+        self.length = arrays["length"]
+        self._zip = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.sample_id)
+
+    def risks(self):
+        return sorted(set(self.risk.tolist()) - {""})
+
+    def prompts(self, risk=None):
+        mask = self.risk == risk if risk else slice(None)
+        return sorted(set(self.prompt[mask].tolist()) - {""})
+
+    def find(self, risk=None, prompt=None, epoch=None):
+        """조건에 맞는 항목의 인덱스 배열"""
+        mask = np.ones(len(self), dtype=bool)
+        if risk:
+            mask &= self.risk == risk
+        if prompt:
+            mask &= self.prompt == prompt
+        if epoch is not None:
+            mask &= self.epoch == epoch
+        return np.flatnonzero(mask)
+
+    def page(self, risk=None, prompt=None, page=0, page_size=20):
+        """(해당 페이지의 인덱스 배열, 전체 개수)"""
+        hits = self.find(risk, prompt)
+        return hits[page * page_size:(page + 1) * page_size], len(hits)
+
+    def _archive(self):
+        if self._zip is None:
+            self._zip = zipfile.ZipFile(self.eval_path, "r")
+        return self._zip
+
+    def read(self, i):
+        """i 번째 항목의 샘플 JSON 하나만 읽어서 반환"""
+        with self._lock, stage("dialogue_index.read"):
+            zf = self._archive()
+            member = str(self.member[i])
+            with zf.open(member, "r") as f:
+                if self.length[i] < 0:
+                    return json.load(f)
+                f.seek(int(self.offset[i]))
+                return json.loads(f.read(int(self.length[i])))
+
+    def close(self):
+        with self._lock:
+            if self._zip is not None:
+                self._zip.close()
+                self._zip = None
+
+
+def dialogue_turns(sample):
+    """샘플 JSON → [{"user": ...}, {"model": ...}] 형식의 대화 목록"""
+    turns = []
+    messages = sample.get("messages")
+    if messages is None:
+        messages = sample["input"] if isinstance(sample.get("input"), list) else [{"role": "user", "content": sample.get("input", "")}]
+        output = sample.get("output", {}).get("completion") if isinstance(sample.get("output"), dict) else None
+        if output:
+            messages = messages + [{"role": "assistant", "content": output}]
+    for message in messages:
+        content = message.get("content", "")
+        if isinstance(content, list):
+            content = "\n".join(part.get("text", "") for part in content if isinstance(part, dict))
+        if message.get("role") == "user":
+            turns.append({"user": content})
+        elif message.get("role") == "assistant":
+            turns.append({"model": content})
+    return turns
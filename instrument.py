@@ -0,0 +1,119 @@
+"""파이프라인 단계별 시간/메모리 계측
+
+    with stage("excel.read"):
+        ...
+
+    @timed("dic_return")
+    def dic_return(...): ...
+
+단계별 누적 wall time, 호출 횟수, (옵션) tracemalloc 기준 순할당 메모리를 프로세스 단위로 모으고
+JSON 또는 Chrome trace(chrome://tracing, Perfetto) 형식으로 내보낸다.
+"""
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+_lock = threading.Lock()
+_stats = {}
+_events = deque(maxlen=20_000)
+_origin = time.perf_counter()
+
+
+def enable_memory_tracking():
+    """tracemalloc 시작 (켜져 있을 때만 단계별 할당 메모리를 기록, 켜면 전체 실행이 느려짐)"""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable_memory_tracking():
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+class stage:
+    """이름 붙은 구간을 계측하는 context manager"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self._mem = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        alloc = None
+        if self._mem is not None and tracemalloc.is_tracing():
+            alloc = tracemalloc.get_traced_memory()[0] - self._mem
+        record(self.name, self._start, end, alloc)
+        return False
+
+
+def timed(name):
+    """함수 전체를 하나의 단계로 계측하는 데코레이터"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def record(name, start, end, alloc_bytes=None):
+    wall = end - start
+    with _lock:
+        entry = _stats.get(name)
+        if entry is None:
+            entry = _stats[name] = {"calls": 0, "total_s": 0.0, "max_s": 0.0, "last_s": 0.0, "alloc_bytes": None}
+        entry["calls"] += 1
+        entry["total_s"] += wall
+        entry["max_s"] = max(entry["max_s"], wall)
+        entry["last_s"] = wall
+        if alloc_bytes is not None:
+            entry["alloc_bytes"] = (entry["alloc_bytes"] or 0) + alloc_bytes
+        _events.append((name, start, wall, os.getpid(), threading.get_ident(), alloc_bytes))
+
+
+def snapshot():
+    """{단계 이름: {calls, total_s, mean_s, max_s, last_s, alloc_bytes}} 복사본"""
+    with _lock:
+        return {
+            name: {**entry, "mean_s": entry["total_s"] / entry["calls"]}
+            for name, entry in sorted(_stats.items())
+        }
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+        _events.clear()
+
+
+def export_json():
+    return json.dumps({"stages": snapshot()}, ensure_ascii=False, indent=1)
+
+
+def export_chrome_trace():
+    """Chrome trace event 형식(JSON) 문자열. 각 구간은 complete event("ph": "X")"""
+    with _lock:
+        events = list(_events)
+    trace = [
+        {
+            "name": name,
+            "cat": name.split(".")[0],
+            "ph": "X",
+            "ts": (start - _origin) * 1e6,
+            "dur": wall * 1e6,
+            "pid": pid,
+            "tid": tid,
+            "args": {} if alloc is None else {"alloc_bytes": alloc},
+        }
+        for name, start, wall, pid, tid, alloc in events
+    ]
+    return json.dumps({"traceEvents": trace, "displayTimeUnit": "ms"})
@@ -0,0 +1,206 @@
+"""log/ 폴더를 감시하면서 새로 생기거나 바뀐 .eval 로그만 백그라운드에서 파싱해 집계에 반영
+
+평가가 진행되는 동안 로그 파일은 계속 추가/갱신되므로, 주기적으로 stat 만 비교해서
+(크기, mtime) 이 바뀐 로그만 프로세스 풀에서 다시 파싱한다. 로그별 셀 부분 집계를 따로 들고 있다가
+바뀐 로그의 몫만 교체해서 merge_cell_scores 로 합치므로 나머지 로그는 다시 읽지 않는다.
+쓰는 중인 파일을 읽지 않도록, 두 번 연속 같은 stat 이 관찰되었거나 한 polling 주기 이상 바뀌지 않은 로그만 처리한다.
+시작할 때는 load_aggregates 의 npz 캐시로 기존 로그를 채우므로, 바뀌지 않은 로그는 다시 파싱하지 않는다.
+
+    watcher = LogWatcher("log/", interval=2.0).start()
+    watcher.wait_for_update(version, timeout=30)   # 새 데이터가 들어올 때까지 대기
+    watcher.cell_scores()                          # 전체 로그 병합 결과
+
+inotify 같은 OS 이벤트는 플랫폼마다 달라서 표준 라이브러리만으로 동작하는 polling 방식을 쓴다.
+"""
+import os
+import threading
+import time
+
+from instrument import stage
+from sample_store import SampleStore
+from utils import cell_scores_from_aggregate, find_eval_logs, load_aggregates, merge_cell_scores, process_pool
+
+
+def _log_cell_scores(eval_path):
+    # 프로세스 풀 워커: 로그 하나 → 셀 단위 부분 집계 (SampleStore 배열로 바로 집계, input 원문은 읽지 않음)
+    return SampleStore.from_eval(eval_path).cell_scores()
+
+
+def _stat_key(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class LogWatcher:
+    def __init__(self, source, interval=2.0, max_workers=None, cache_dir="agg_cache"):
+        self.source = source
+        self.interval = interval
+        self.max_workers = max_workers
+        self.cache_dir = cache_dir
+        self.version = 0
+        self.last_update = None
+        self.errors = {}            # {eval_path: 마지막 파싱 오류 메시지}
+        self._partials = {}         # {eval_path: 셀 부분 집계}
+        self._stats = {}            # {eval_path: 파싱한 시점의 (size, mtime_ns)}
+        self._pending = {}          # {eval_path: 직전 polling 에서 본 (size, mtime_ns)}
+        self._merged = {}
+        self._callbacks = []
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        self._executor = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="log-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def subscribe(self, callback):
+        """집계가 바뀔 때마다 callback(version) 호출 (watcher 스레드에서 실행됨)"""
+        with self._cond:
+            self._callbacks.append(callback)
+
+    def _run(self):
+        try:
+            self._seed()
+        except Exception as e:
+            # 캐시로 채우지 못한 로그는 아래 polling 에서 로그별로 파싱
+            print(f"⚠️ 집계 캐시 로드 실패: {e}")
+        while not self._stop.is_set():
+            try:
+                self.scan()
+            except Exception as e:
+                print(f"⚠️ 로그 감시 오류: {e}")
+            self._stop.wait(self.interval)
+
+    def _seed(self):
+        """기존 로그를 load_aggregates 캐시(바뀐 로그만 다시 파싱)로 한 번에 반영"""
+        seen = {}
+        for eval_path in find_eval_logs(self.source):
+            try:
+                key = _stat_key(eval_path)
+            except FileNotFoundError:
+                continue
+            # 최근에 바뀐(쓰는 중일 수 있는) 로그는 캐시에 넣지 않고 polling 규칙대로 처리
+            if time.time_ns() - key[1] > self.interval * 1e9:
+                seen[eval_path] = key
+        if not seen:
+            return
+        with stage("watch.seed"):
+            aggregates = load_aggregates(list(seen), cache_dir=self.cache_dir, max_workers=self.max_workers)
+        for eval_path, aggregate in aggregates.items():
+            # 로드 도중 파일이 바뀌었으면 기록된 stat 이 달라서 다음 polling 에서 다시 파싱됨
+            self._partials[eval_path] = cell_scores_from_aggregate(aggregate)
+            self._stats[eval_path] = seen[eval_path]
+        self._publish(len(aggregates))
+
+    def _changed_logs(self):
+        """(처리할 로그, 사라진 로그, 현재 stat) 반환. 바뀐 지 얼마 안 된 로그는 다음 polling 까지 보류"""
+        seen = {}
+        for eval_path in find_eval_logs(self.source):
+            try:
+                seen[eval_path] = _stat_key(eval_path)
+            except FileNotFoundError:
+                continue
+
+        ready = []
+        for eval_path, key in seen.items():
+            if self._stats.get(eval_path) == key:
+                self._pending.pop(eval_path, None)
+            elif self._pending.get(eval_path) == key or time.time_ns() - key[1] > self.interval * 1e9:
+                # 이미 한 polling 주기 이상 바뀌지 않은 파일은 바로 처리
+                ready.append(eval_path)
+            else:
+                self._pending[eval_path] = key
+        removed = [eval_path for eval_path in self._stats if eval_path not in seen]
+        for eval_path in list(self._pending):
+            if eval_path not in seen:
+                self._pending.pop(eval_path, None)
+        return ready, removed, seen
+
+    def _parse(self, eval_paths):
+        if len(eval_paths) == 1 or self.max_workers == 1:
+            return [_log_cell_scores(eval_path) for eval_path in eval_paths]
+        if self._executor is None:
+            self._executor = process_pool(self.max_workers)
+        futures = [self._executor.submit(_log_cell_scores, eval_path) for eval_path in eval_paths]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def scan(self):
+        """한 번 polling 해서 바뀐 로그만 반영. 반영된 로그 경로 목록을 반환"""
+        ready, removed, seen = self._changed_logs()
+        if not ready and not removed:
+            return []
+
+        with stage("watch.parse"):
+            try:
+                results = self._parse(ready)
+            except Exception as e:
+                results = [e] * len(ready)
+
+        updated, failed = [], []
+        for eval_path, result in zip(ready, results):
+            self._pending.pop(eval_path, None)
+            if isinstance(result, Exception):
+                # 쓰는 중이거나 깨진 로그: 이전 집계를 유지하고, 파일이 다시 바뀌면 재시도
+                self.errors[eval_path] = str(result)
+                self._stats[eval_path] = seen[eval_path]
+                failed.append(eval_path)
+                continue
+            self.errors.pop(eval_path, None)
+            self._partials[eval_path] = result
+            self._stats[eval_path] = seen[eval_path]
+            updated.append(eval_path)
+        for eval_path in removed:
+            self._partials.pop(eval_path, None)
+            self._stats.pop(eval_path, None)
+            self.errors.pop(eval_path, None)
+            updated.append(eval_path)
+        if not updated and not failed:
+            return []
+        self._publish(len(updated))
+        return updated
+
+    def _publish(self, n_updated):
+        merged = merge_cell_scores(self._partials.values())
+        with self._cond:
+            self._merged = merged
+            self.version += 1
+            self.last_update = time.time()
+            version = self.version
+            callbacks = list(self._callbacks)
+            self._cond.notify_all()
+        for callback in callbacks:
+            callback(version)
+        print(f"📡 로그 {n_updated}개 반영 (총 {len(self._partials)}개, version {version})")
+
+    def wait_for_update(self, version, timeout=None):
+        """version 보다 새 집계가 생길 때까지 대기. 최신 version 반환"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.version != version or self._stop.is_set(), timeout=timeout)
+            return self.version
+
+    def cell_scores(self):
+        """{(risk_id, prompt_id): (score_sum, count)} 전체 로그 병합 결과"""
+        with self._cond:
+            return self._merged
+
+    def logs(self):
+        with self._cond:
+            return sorted(self._partials)
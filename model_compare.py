@@ -0,0 +1,86 @@
+"""여러 모델의 요약 엑셀을 (model × risk × prompt) NumPy 텐서로 모아서 비교
+
+모델마다 DataFrame 을 pivot 하지 않고, build_stat_frame 의 long 테이블을 정수 인덱스로
+텐서에 한 번에 채운 뒤 diff / rank / delta heatmap 을 배열 연산으로 계산한다.
+"""
+import glob
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from instrument import stage
+from utils import PROMPT_TYPES, RISK_TYPES, build_stat_frame, read_summary_sheet, summary_columns
+
+TENSOR_STATS = ("weighted_mean_score", "sum_base_score")
+
+
+def find_model_runs(pattern):
+    """glob 패턴 → {모델 이름(파일 이름): 경로}"""
+    return {os.path.splitext(os.path.basename(path))[0]: path for path in sorted(glob.glob(pattern))}
+
+
+def build_score_tensor(stat_frames, risk_codes=None, prompt_codes=None):
+    """{모델 이름: build_stat_frame 결과} → {stat: (model, risk, prompt) float 배열}, 빈 셀은 NaN"""
+    risk_codes = list(risk_codes or RISK_TYPES)
+    prompt_codes = list(prompt_codes or PROMPT_TYPES)
+    risk_index = pd.Index(risk_codes)
+    prompt_index = pd.Index(prompt_codes)
+
+    shape = (len(stat_frames), len(risk_codes), len(prompt_codes))
+    tensors = {stat: np.full(shape, np.nan) for stat in TENSOR_STATS}
+    for m, stat_frame in enumerate(stat_frames.values()):
+        r = risk_index.get_indexer(stat_frame["risk_code"])
+        p = prompt_index.get_indexer(stat_frame["prompt_code"])
+        known = (r >= 0) & (p >= 0)
+        for stat in TENSOR_STATS:
+            tensors[stat][m, r[known], p[known]] = stat_frame[stat].to_numpy()[known]
+    return tensors
+
+
+def load_score_tensor(model_paths, risk_codes=None, prompt_codes=None):
+    """{모델 이름: 엑셀 경로} → (tensors, model_names). pRP 파생형은 dic_return 과 같이 pRP 로 통합"""
+    with stage("compare.load"):
+        stat_frames = {
+            name: build_stat_frame(read_summary_sheet(path, "Sheet1", columns=summary_columns))
+            for name, path in model_paths.items()
+        }
+        return build_score_tensor(stat_frames, risk_codes, prompt_codes), list(stat_frames)
+
+
+def model_diff(tensor, a, b):
+    """모델 b - 모델 a (risk × prompt). 둘 중 하나라도 비어 있으면 NaN"""
+    return tensor[b] - tensor[a]
+
+
+def delta_from_baseline(tensor, baseline):
+    """모든 모델 - 기준 모델 (model × risk × prompt)"""
+    return tensor - tensor[baseline][np.newaxis]
+
+
+def rank_models(tensor):
+    """셀마다 모델 순위 (점수 높을수록 1위, 비어 있는 셀은 NaN) → (model × risk × prompt)"""
+    filled = np.where(np.isnan(tensor), -np.inf, tensor)
+    order = np.argsort(-filled, axis=0, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, tensor.shape[0] + 1)[:, None, None], axis=0)
+    return np.where(np.isnan(tensor), np.nan, ranks.astype(float))
+
+
+def mean_scores(tensor):
+    """모델별 전체 셀 평균 점수"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanmean(tensor.reshape(tensor.shape[0], -1), axis=1)
+
+
+def to_heatmap_frame(matrix, risk_codes=None, prompt_codes=None):
+    """(risk × prompt) 배열 → 대시보드 heatmap 과 같은 방향(행: prompt, 열: risk)의 DataFrame"""
+    risk_codes = list(risk_codes or RISK_TYPES)
+    prompt_codes = list(prompt_codes or PROMPT_TYPES)
+    return pd.DataFrame(
+        matrix.T,
+        index=[PROMPT_TYPES.get(p, p) for p in prompt_codes],
+        columns=[RISK_TYPES.get(r, r) for r in risk_codes],
+    )
@@ -0,0 +1,195 @@
+"""한 번의 스트리밍으로 평균/분산을 갱신하는 온라인 집계기 (Welford / Chan 병합)
+
+샘플 단위로 epoch 점수의 running count/mean/M2 를 들고 있고, (risk, prompt) 셀 단위로
+epoch 점수 전체의 running 통계를 함께 갱신한다. 셀의 "샘플 평균의 평균"(= notMC_parsing →
+generate_dataframe_with_exclusions 결과)과 그 분산은 샘플 통계에서 바로 계산한다.
+새 epoch, 새 로그, 다른 워커의 부분 집계는 merge 로 합치므로 이전 데이터를 다시 읽을 필요가 없다.
+"""
+import os
+
+import numpy as np
+
+from instrument import stage
+from sample_store import INVALID_GRADE, grade_codes, grade_scores
+from utils import find_eval_logs, fold_prompt_ids, iter_eval_summaries, parallel_map, split_sample_ids
+
+
+class RunningStats:
+    """인덱스별 running count / mean / M2 배열 (필요하면 자동으로 늘어남)"""
+
+    def __init__(self, size=0):
+        self.count = np.zeros(size, dtype=np.int64)
+        self.mean = np.zeros(size, dtype=np.float64)
+        self.m2 = np.zeros(size, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.count)
+
+    def grow(self, size):
+        if size > len(self.count):
+            extra = size - len(self.count)
+            self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+            self.mean = np.concatenate([self.mean, np.zeros(extra, dtype=np.float64)])
+            self.m2 = np.concatenate([self.m2, np.zeros(extra, dtype=np.float64)])
+
+    def update(self, index, values):
+        """index[i] 칸에 values[i] 를 추가 (배치 단위로 통계를 낸 뒤 병합)"""
+        if not len(index):
+            return
+        size = max(len(self.count), int(index.max()) + 1)
+        self.grow(size)
+        batch_count = np.bincount(index, minlength=size)
+        batch_sum = np.bincount(index, weights=values, minlength=size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            batch_mean = np.where(batch_count > 0, batch_sum / np.maximum(batch_count, 1), 0.0)
+        batch_m2 = np.bincount(index, weights=(values - batch_mean[index]) ** 2, minlength=size)
+        self._merge_arrays(np.arange(size), batch_count, batch_mean, batch_m2)
+
+    def merge(self, other, target_index=None):
+        """다른 RunningStats 를 병합. target_index[i] 는 other 의 i 번째 칸이 들어갈 위치"""
+        if target_index is None:
+            target_index = np.arange(len(other))
+        if len(target_index):
+            self.grow(int(target_index.max()) + 1)
+        self._merge_arrays(target_index, other.count, other.mean, other.m2)
+
+    def _merge_arrays(self, target, count_b, mean_b, m2_b):
+        # Chan et al. 병렬 분산 병합 공식
+        present = count_b > 0
+        target, count_b, mean_b, m2_b = target[present], count_b[present], mean_b[present], m2_b[present]
+        count_a = self.count[target]
+        total = count_a + count_b
+        delta = mean_b - self.mean[target]
+        self.mean[target] += delta * count_b / total
+        self.m2[target] += m2_b + delta ** 2 * count_a * count_b / total
+        self.count[target] = total
+
+    def variance(self, ddof=1):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > ddof, self.m2 / (self.count - ddof), np.nan)
+
+
+class OnlineAggregator:
+    def __init__(self):
+        self.cell_keys = []      # [(risk_id, prompt_id)]
+        self.sample_keys = []    # [(source, sample_id)] 같은 id 라도 로그가 다르면 다른 샘플
+        self._cell_index = {}
+        self._sample_index = {}
+        self.sample_cell = np.zeros(0, dtype=np.int64)
+        self.sample_stats = RunningStats()   # 샘플별 epoch 점수
+        self.cell_stats = RunningStats()     # 셀별 epoch 점수 전체
+        self.invalid_grades = 0
+
+    def _cell(self, key):
+        index = self._cell_index.get(key)
+        if index is None:
+            index = self._cell_index[key] = len(self.cell_keys)
+            self.cell_keys.append(key)
+        return index
+
+    def _samples(self, sample_keys, cells):
+        # 처음 보는 샘플은 새 인덱스를 받고 sample_cell 도 함께 늘림
+        indices = np.empty(len(sample_keys), dtype=np.int64)
+        new_cells = []
+        for i, (sample_key, cell) in enumerate(zip(sample_keys, cells)):
+            index = self._sample_index.get(sample_key)
+            if index is None:
+                index = self._sample_index[sample_key] = len(self.sample_keys)
+                self.sample_keys.append(sample_key)
+                new_cells.append(cell)
+            indices[i] = index
+        if new_cells:
+            self.sample_cell = np.concatenate([self.sample_cell, np.array(new_cells, dtype=np.int64)])
+        return indices
+
+    def add(self, sample_ids, grades, source=None):
+        """(샘플 id, 채점 값 문자열) 배치를 추가. 점수는 grade_scores 로 계산
+
+        source 는 로그 구분용 키. 같은 source 의 같은 id 는 epoch 가 추가되는 것으로 보고 합친다
+        """
+        sample_ids = list(sample_ids)
+        if not sample_ids:
+            return
+        risk, prompt, matched = split_sample_ids(sample_ids)
+        keep = np.flatnonzero(matched)
+        codes = grade_codes([grades[i] for i in keep])
+        values = grade_scores(codes)
+        self.invalid_grades += int(np.count_nonzero(codes == INVALID_GRADE))
+
+        prompt = fold_prompt_ids(prompt)
+        cells = [self._cell((str(risk[i]), str(prompt[i]))) for i in keep]
+        samples = self._samples([(source, sample_ids[i]) for i in keep], cells)
+        self.sample_stats.update(samples, values)
+        self.cell_stats.update(np.asarray(cells, dtype=np.int64), values)
+
+    def add_eval(self, eval_path, batch_size=50_000, source=None):
+        """summaries.json 을 스트리밍하면서 batch_size 단위로 집계에 반영 (source 기본값: 파일 경로)"""
+        source = os.path.abspath(eval_path) if source is None else source
+        with stage("online.add_eval"):
+            ids, grades = [], []
+            for item in iter_eval_summaries(eval_path):
+                ids.append(item["id"])
+                grades.append(item.get("scores", {}).get("model_graded_qa", {}).get("value"))
+                if len(ids) >= batch_size:
+                    self.add(ids, grades, source)
+                    ids, grades = [], []
+            self.add(ids, grades, source)
+        return self
+
+    def merge(self, other):
+        """다른 워커/로그의 부분 집계를 병합 (같은 (source, 샘플 id) 는 epoch 통계끼리 합쳐짐)"""
+        cell_map = np.array([self._cell(key) for key in other.cell_keys], dtype=np.int64)
+        samples = self._samples(other.sample_keys, cell_map[other.sample_cell].tolist())
+        self.sample_stats.merge(other.sample_stats, samples)
+        self.cell_stats.merge(other.cell_stats, cell_map)
+        self.invalid_grades += other.invalid_grades
+        return self
+
+    @classmethod
+    def from_eval_logs(cls, source, max_workers=None):
+        """여러 .eval 로그를 프로세스 풀에서 각각 집계한 뒤 병합"""
+        eval_paths = find_eval_logs(source)
+        partials = parallel_map(_aggregate_log, eval_paths, max_workers)
+        merged = cls()
+        for partial in partials:
+            merged.merge(partial)
+        return merged
+
+    def sample_means(self):
+        return self.sample_stats.mean[:len(self.sample_keys)]
+
+    def cell_summary(self):
+        """{(risk_id, prompt_id): {count, mean, var, epoch_count, epoch_mean, epoch_var}}
+
+        count/mean/var 는 샘플 평균 점수 기준 (generate_dataframe_with_exclusions 의 셀 평균과 같음),
+        epoch_* 는 셀 안의 epoch 점수 전체 기준
+        """
+        n_cells = len(self.cell_keys)
+        sample_means = self.sample_means()
+        sample_cell = self.sample_cell
+        count = np.bincount(sample_cell, minlength=n_cells)
+        total = np.bincount(sample_cell, weights=sample_means, minlength=n_cells)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / count
+            var = np.bincount(sample_cell, weights=(sample_means - mean[sample_cell]) ** 2, minlength=n_cells) / (count - 1)
+        var = np.where(count > 1, var, np.nan)
+        epoch_var = self.cell_stats.variance()
+        return {
+            key: {
+                "count": int(count[i]),
+                "mean": float(mean[i]),
+                "var": float(var[i]),
+                "epoch_count": int(self.cell_stats.count[i]),
+                "epoch_mean": float(self.cell_stats.mean[i]),
+                "epoch_var": float(epoch_var[i]),
+            }
+            for i, key in enumerate(self.cell_keys)
+        }
+
+    def cell_scores(self):
+        """{(risk_id, prompt_id): (score_sum, count)} (merge_cell_scores / matrix_from_cell_scores 와 호환)"""
+        return {key: (stats["mean"] * stats["count"], stats["count"]) for key, stats in self.cell_summary().items()}
+
+
+def _aggregate_log(eval_path):
+    return OnlineAggregator().add_eval(eval_path)
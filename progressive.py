@@ -0,0 +1,315 @@
+"""아주 큰 .eval 로그의 heatmap 을 층화 표본 추정치 → 정확한 값 순서로 점진적으로 보여주기 위한 추정기
+
+1단계 (pilot): 아카이브에 samples/<id>_epoch_<n>.json member 가 있으면 zip central directory 의 이름만으로
+    샘플 id → (risk, prompt) 셀과 셀별 샘플 수 N 을 알 수 있다. 셀마다 샘플 순서를 seed 로 섞어 두고
+    2, 4, 8 ... pilot_size 개씩 층화 무작위 추출해서 그 샘플의 member 만 읽는다 (로그 크기와 무관).
+2단계 (stream): summaries.json 을 batch_size 단위로 스트리밍해서 정확한 집계를 쌓는다.
+    셀 평균 = (이미 읽은 샘플 합 + 아직 안 읽은 샘플 수 × 그중 pilot 샘플 평균) / N 으로 추정하고,
+    남은 샘플이 없어지면 오차 없이 notMC_parsing → generate_dataframe_with_exclusions 와 같은 값이 된다.
+
+samples/ member 가 없는 로그는 pilot 없이 스트리밍만 한다. 이때는 파일 앞쪽 샘플로 만든 추정치라
+무작위 표본이 아니고 N 도 모르므로 구간은 참고용이다.
+
+    progressive = ProgressiveHeatmap("log/big.eval").start()
+    version = progressive.wait_for_update(0, timeout=5)
+    frames = bootstrap.ci_frames(progressive.estimate(confidence=0.9), prompt_types, risk_types)
+"""
+import functools
+import json
+import math
+import os
+import threading
+import zipfile
+from collections import defaultdict
+from statistics import NormalDist
+
+import numpy as np
+
+from dialogue_index import _sample_member_names
+from instrument import stage
+from online_stats import OnlineAggregator
+from utils import fold_prompt_ids, iter_eval_summaries, split_sample_ids
+
+SUMMARY_MEMBER = "summaries.json"
+# 점수 범위 (구간을 이 범위로 자름. 표본이 1개뿐이라 분산을 모르는 셀은 전체 범위)
+SCORE_RANGE = (1.0, 5.0)
+# 분산을 구한 표본이 이보다 적은 셀도 전체 범위 (2개가 우연히 같으면 폭이 0 인 구간이 됨)
+MIN_INTERVAL_SAMPLES = 4
+
+
+@functools.lru_cache(maxsize=None)
+def t_quantile(confidence, df):
+    """자유도 df(정수) Student t 분포의 양측 분위수 t: P(|T| <= t) = confidence
+
+    정수 자유도의 P(|T| <= t) 는 θ = atan(t / √df) 의 유한 급수로 정확히 쓸 수 있으므로 θ 를 이분법으로 찾는다.
+    자유도가 크면 정규분포와 사실상 같으므로 NormalDist 를 쓴다
+    """
+    if df > 1000:
+        return NormalDist().inv_cdf((1 + confidence) / 2)
+
+    def coverage(theta):
+        cos2 = math.cos(theta) ** 2
+        term = total = 1.0
+        if df % 2:
+            for j in range(1, (df - 1) // 2):
+                term *= 2 * j / (2 * j + 1) * cos2
+                total += term
+            return 2 / math.pi * (theta + (math.sin(theta) * math.cos(theta) * total if df > 1 else 0.0))
+        for j in range(1, df // 2):
+            term *= (2 * j - 1) / (2 * j) * cos2
+            total += term
+        return math.sin(theta) * total
+
+    low, high = 0.0, math.pi / 2
+    for _ in range(60):
+        mid = (low + high) / 2
+        low, high = (mid, high) if coverage(mid) < confidence else (low, mid)
+    return math.sqrt(df) * math.tan((low + high) / 2)
+
+
+def _half_width(confidence, var, n, sample_count=None, fpc=1.0):
+    """표본 n 개 평균의 t 구간 반폭 (분산은 sample_count 개 표본에서 구함, fpc 는 유한 모집단 보정)
+
+    표본이 적거나, 표본이 모두 같은 값이라 분산이 0 인데 안 읽은 샘플이 남은 경우는 NaN (→ 전체 범위)
+    """
+    sample_count = n if sample_count is None else sample_count
+    if sample_count < MIN_INTERVAL_SAMPLES or np.isnan(var) or (var == 0 and fpc > 0):
+        return np.nan
+    return t_quantile(confidence, sample_count - 1) * np.sqrt(var / n * fpc)
+
+
+def _grade(item):
+    return item.get("scores", {}).get("model_graded_qa", {}).get("value")
+
+
+class ProgressiveHeatmap:
+    def __init__(self, eval_path, pilot_size=30, batch_size=50_000, seed=0):
+        self.eval_path = eval_path
+        self.pilot_size = pilot_size
+        self.batch_size = batch_size
+        self.version = 0
+        self.phase = "index"
+        self.error = None
+        self._pilot = OnlineAggregator()
+        self._stream = OnlineAggregator()
+        self._stream_iter = None
+        self._stream_offset = 0
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.totals = {}            # 셀별 샘플 수 N (samples/ member 가 있을 때만)
+        self._members = defaultdict(list)
+        self._strata = defaultdict(list)
+        self._pilot_taken = 0
+        self._zf = None
+        self._seed = seed
+        self._stream_size = 0
+
+    # --------------------------
+    # 백그라운드 실행
+    # --------------------------
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="progressive-heatmap", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        try:
+            while not self._stop.is_set() and self.step():
+                pass
+        except Exception as e:
+            with self._cond:
+                self.error = str(e)
+                self.version += 1
+                self._cond.notify_all()
+            print(f"⚠️ 점진 집계 오류 ({os.path.basename(self.eval_path)}): {e}")
+
+    def wait_for_update(self, version, timeout=None):
+        """version 보다 새 추정치가 생길 때까지 대기. 최신 version 반환"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.version != version or self.done, timeout=timeout)
+            return self.version
+
+    @property
+    def done(self):
+        return self.phase == "done"
+
+    @property
+    def stopped(self):
+        """stop() 으로 중간에 멈춘 경우 True (이후 추정치는 더 갱신되지 않음)"""
+        return self._stop.is_set() and not self.done
+
+    def progress(self):
+        """summaries.json 을 읽은 비율 (0~1)"""
+        if self.done:
+            return 1.0
+        return min(self._stream_offset / self._stream_size, 1.0) if self._stream_size else 0.0
+
+    # --------------------------
+    # 한 단계씩 집계
+    # --------------------------
+    def step(self):
+        """목차 읽기, pilot 한 라운드 또는 스트리밍 한 배치를 처리. 더 할 일이 남았으면 True"""
+        if self.phase == "index":
+            self._read_index()
+        elif self.phase == "pilot":
+            self._pilot_round()
+        elif self.phase == "stream":
+            self._stream_batch()
+        return not self.done
+
+    def _read_index(self):
+        # member 가 많은 로그는 central directory 만 읽어도 몇 초 걸리므로 백그라운드 첫 단계에서 처리
+        sample_members = {}
+        with stage("progressive.index"):
+            if zipfile.is_zipfile(self.eval_path):
+                self._zf = zipfile.ZipFile(self.eval_path, "r")
+                sample_members = _sample_member_names(self._zf)
+                self._stream_size = self._zf.getinfo(SUMMARY_MEMBER).file_size
+            else:
+                self._stream_size = os.path.getsize(self.eval_path)
+
+            # 셀별 샘플 id (seed 로 섞은 순서) 와 샘플별 epoch member
+            for (sample_id, epoch), name in sorted(sample_members.items()):
+                self._members[sample_id].append(name)
+            sample_ids = list(self._members)
+            if sample_ids:
+                risk, prompt, matched = split_sample_ids(sample_ids)
+                prompt = fold_prompt_ids(prompt)
+                for i in np.flatnonzero(matched):
+                    self._strata[(str(risk[i]), str(prompt[i]))].append(sample_ids[i])
+            rng = np.random.default_rng(self._seed)
+            for cell_ids in self._strata.values():
+                rng.shuffle(cell_ids)
+
+        if not self._strata and self._zf is not None:
+            self._zf.close()
+            self._zf = None
+        with self._cond:
+            self.totals = {key: len(cell_ids) for key, cell_ids in self._strata.items()}
+            self.phase = "pilot" if self._strata else "stream"
+            self.version += 1
+            self._cond.notify_all()
+
+    def _pilot_round(self):
+        # 셀마다 pilot 표본을 2배씩 늘림 (2 → 4 → 8 ... → pilot_size)
+        target = min(max(2, self._pilot_taken * 2), self.pilot_size)
+        # central directory 를 다시 읽지 않도록 pilot 이 끝날 때까지 _read_index 에서 연 아카이브를 그대로 씀
+        ids, grades = [], []
+        with stage("progressive.pilot"):
+            for cell_ids in self._strata.values():
+                for sample_id in cell_ids[self._pilot_taken:target]:
+                    for name in self._members[sample_id]:
+                        with self._zf.open(name) as f:
+                            ids.append(sample_id)
+                            grades.append(_grade(json.load(f)))
+        finished = target >= self.pilot_size or target >= max(self.totals.values())
+        if finished:
+            self._zf.close()
+            self._zf = None
+        with self._cond:
+            self._pilot.add(ids, grades)
+            self._pilot_taken = target
+            if finished:
+                self.phase = "stream"
+            self.version += 1
+            self._cond.notify_all()
+
+    def _stream_batch(self):
+        if self._stream_iter is None:
+            self._stream_iter = iter_eval_summaries(self.eval_path, with_offsets=True)
+        ids, grades = [], []
+        with stage("progressive.stream"):
+            for item, _, end in self._stream_iter:
+                ids.append(item["id"])
+                grades.append(_grade(item))
+                self._stream_offset = end
+                if len(ids) >= self.batch_size:
+                    break
+            else:
+                self._stream_iter = None
+        with self._cond:
+            self._stream.add(ids, grades)
+            if self._stream_iter is None:
+                self.phase = "done"
+            self.version += 1
+            self._cond.notify_all()
+
+    # --------------------------
+    # 추정치
+    # --------------------------
+    def _unseen_pilot(self):
+        """셀별 (아직 스트리밍에서 안 읽은 pilot 샘플 수, 그 평균, pilot 전체 분산, pilot 샘플 수)
+
+        pilot 은 셀 안에서 무작위로 뽑았으므로, 그중 아직 안 읽은 샘플은 안 읽은 샘플 전체의 무작위 표본이다.
+        분산은 남은 pilot 샘플이 적어져도 흔들리지 않도록 pilot 전체에서 구한다
+        """
+        pilot = self._pilot
+        unseen = np.array([key not in self._stream._sample_index for key in pilot.sample_keys], dtype=bool)
+        means, cells = pilot.sample_means()[unseen], pilot.sample_cell[unseen]
+        n_cells = len(pilot.cell_keys)
+        count = np.bincount(cells, minlength=n_cells)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.bincount(cells, weights=means, minlength=n_cells) / count
+        return {key: (int(count[i]), float(mean[i]), stats["var"], stats["count"])
+                for i, (key, stats) in enumerate(pilot.cell_summary().items())}
+
+    def estimate(self, confidence=0.95):
+        """셀별 (risk_ids × prompt_ids) 배열 dict: mean, low, high, count, total (bootstrap.ci_frames 와 호환)
+
+        count 는 값에 반영된 샘플 수, total 은 셀의 전체 샘플 수 (모르면 NaN). 끝나면 low == mean == high.
+        신뢰수준은 구간 폭에만 쓰이므로 집계를 다시 하지 않고 호출할 때마다 바꿀 수 있다.
+        표본이 적으므로 구간은 정규분포 대신 Student t 분위수로 구한다
+        """
+        with self._lock:
+            streamed = self._stream.cell_summary()
+            unseen = self._unseen_pilot()
+            done = self.done
+
+        cells = {}
+        for key in set(streamed) | set(unseen):
+            stream = streamed.get(key, {"count": 0, "mean": 0.0, "var": np.nan})
+            total = self.totals.get(key)
+            if done:
+                cells[key] = (stream["mean"], 0.0, stream["count"], stream["count"])
+            elif total is not None and key in unseen and unseen[key][0]:
+                # 읽은 샘플은 그대로, 남은 샘플은 pilot 평균으로 채움 (유한 모집단 보정)
+                k, pilot_mean, pilot_var, pilot_count = unseen[key]
+                remaining = max(total - stream["count"], k)
+                mean = (stream["mean"] * stream["count"] + remaining * pilot_mean) / (stream["count"] + remaining)
+                half_width = (_half_width(confidence, pilot_var, k, pilot_count, fpc=max(0.0, 1 - k / remaining))
+                              * remaining / (stream["count"] + remaining))
+                cells[key] = (mean, half_width, stream["count"] + k, total)
+            elif stream["count"]:
+                # 스트리밍한 샘플만으로 추정 (무작위 표본이 아님)
+                half_width = _half_width(confidence, stream["var"], stream["count"])
+                cells[key] = (stream["mean"], half_width, stream["count"], total if total is not None else np.nan)
+
+        risk_ids = sorted({risk for risk, _ in cells})
+        prompt_ids = sorted({prompt for _, prompt in cells})
+        shape = (len(risk_ids), len(prompt_ids))
+        result = {"risk_ids": risk_ids, "prompt_ids": prompt_ids}
+        for name in ("mean", "half_width", "count", "total"):
+            result[name] = np.full(shape, np.nan)
+        for (risk, prompt), values in cells.items():
+            r, p = risk_ids.index(risk), prompt_ids.index(prompt)
+            for name, value in zip(("mean", "half_width", "count", "total"), values):
+                result[name][r, p] = value
+
+        # 구간은 점수 범위 안으로 자르고, 분산을 모르는 셀(NaN)은 전체 범위
+        low, high = SCORE_RANGE
+        mean, half_width = result["mean"], result.pop("half_width")
+        result["low"] = np.fmin(mean, np.fmax(mean - half_width, low))
+        result["high"] = np.fmax(mean, np.fmin(mean + half_width, high))
+        result["low"][np.isnan(mean)] = np.nan
+        result["high"][np.isnan(mean)] = np.nan
+        return result
@@ -0,0 +1,136 @@
+"""모델별 주간 리포트용 차트를 프로세스 풀에서 한 번에 렌더링해서 PDF 또는 PNG zip 으로 저장
+
+모델(요약 엑셀) 하나당 heatmap 2개(가중평균 / 산술평균) + 위험 카테고리별 막대그래프 +
+프롬프트 유형별 막대그래프를 만든다. 차트 하나가 작업 하나이고, 워커는 Agg backend 로
+PNG 바이트만 돌려준다. 결과 순서는 작업 순서와 같다.
+
+    python cli.py report final_stat_summary.xlsx runs/*.xlsx -o out/report.pdf
+"""
+import io
+import os
+import re
+import zipfile
+import zlib
+
+from instrument import stage
+from utils import load_summary_matrices, parallel_map
+
+
+def _safe_name(text):
+    return re.sub(r"[^\w.-]+", "_", str(text)).strip("_")
+
+
+def report_jobs(model, heatmap_df_weight, heatmap_df_avg):
+    """차트 작업 목록 [(파일 이름, kind, 인자 dict)]. 막대그래프는 가중평균 점수 기준"""
+    jobs = [
+        (f"{model}/00_heatmap_weight", "heatmap", {"df": heatmap_df_weight}),
+        (f"{model}/01_heatmap_avg", "heatmap", {"df": heatmap_df_avg}),
+    ]
+    for i, risk_type in enumerate(heatmap_df_weight.columns, start=1):
+        scores = heatmap_df_weight[risk_type].dropna()
+        jobs.append((f"{model}/risk_{i:02d}_{_safe_name(risk_type)}", "bar", {
+            "labels": list(scores.index), "values": list(scores.values),
+            "title": f"[{model}] {risk_type}", "xlabel": "prompt type", "rotation": 20,
+            "figsize": (12, 4), "cmap": "YlGnBu",
+        }))
+    for i, prompt_type in enumerate(heatmap_df_weight.index, start=1):
+        scores = heatmap_df_weight.loc[prompt_type].dropna()
+        jobs.append((f"{model}/prompt_{i:02d}_{_safe_name(prompt_type)}", "bar", {
+            "labels": list(scores.index), "values": list(scores.values),
+            "title": f"[{model}] {prompt_type}", "xlabel": "risk category", "rotation": 90,
+            "figsize": (14, 6), "cmap": "YlGnBu",
+        }))
+    return jobs
+
+
+def _render_job(job):
+    # 프로세스 풀 워커: GUI backend 를 쓰지 않도록 Agg 로 고정
+    import matplotlib
+    matplotlib.use("Agg")
+    from charts import render_bar, render_heatmap
+
+    name, kind, kwargs = job
+    if kind == "heatmap":
+        return name, render_heatmap(kwargs["df"])
+    kwargs = dict(kwargs)
+    return name, render_bar(kwargs.pop("labels"), kwargs.pop("values"), **kwargs)
+
+
+def render_jobs(jobs, max_workers=None):
+    """작업 목록 → [(파일 이름, PNG 바이트)] (작업 순서 유지)"""
+    with stage("report.render"):
+        return parallel_map(_render_job, jobs, max_workers)
+
+
+def write_pdf(images, output, dpi=200):
+    """PNG 들을 한 페이지에 하나씩 PDF 로 저장 (matplotlib 의존성인 Pillow 로 디코딩)
+
+    페이지를 하나씩 디코딩 → RGB 픽셀을 zlib(FlateDecode) 로 압축해서 바로 파일에 쓰므로 메모리에는 한 페이지만 올라가고,
+    손실 압축이 아니라서 heatmap 주석/눈금 글자가 번지지 않음.
+    Pillow 의 save_all 은 모든 페이지를 디코딩한 채로 들고 있고, append 모드는 페이지마다 PDF 전체를 다시 읽음
+    """
+    from PIL import Image
+
+    if not images:
+        raise ValueError("저장할 차트가 없습니다")
+    # 객체 번호: 1 catalog, 2 page tree, 페이지 i 마다 (page, contents, image) 3개
+    n_pages = len(images)
+    offsets = []
+
+    with open(output, "wb") as f:
+        def write_object(body, stream=None):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % len(offsets) + body)
+            if stream is not None:
+                f.write(b"\nstream\n" + stream + b"\nendstream")
+            f.write(b"\nendobj\n")
+
+        f.write(b"%PDF-1.4\n")
+        write_object(b"<< /Type /Catalog /Pages 2 0 R >>")
+        kids = " ".join(f"{3 + 3 * i} 0 R" for i in range(n_pages))
+        write_object(f"<< /Type /Pages /Kids [{kids}] /Count {n_pages} >>".encode())
+        for i, (_, data) in enumerate(images):
+            page_ref = 3 + 3 * i
+            with Image.open(io.BytesIO(data)) as png:
+                width, height = png.size
+                pixels = zlib.compress(png.convert("RGB").tobytes())
+            page_width, page_height = width * 72 / dpi, height * 72 / dpi
+            draw = f"q {page_width:.2f} 0 0 {page_height:.2f} 0 0 cm /chart Do Q".encode()
+            write_object(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page_width:.2f} {page_height:.2f}] "
+                         f"/Resources << /XObject << /chart {page_ref + 2} 0 R >> >> /Contents {page_ref + 1} 0 R >>".encode())
+            write_object(f"<< /Length {len(draw)} >>".encode(), draw)
+            write_object(f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} /ColorSpace /DeviceRGB "
+                         f"/BitsPerComponent 8 /Filter /FlateDecode /Length {len(pixels)} >>".encode(), pixels)
+
+        xref_offset = f.tell()
+        f.write(f"xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n".encode())
+        f.writelines(b"%010d 00000 n \n" % offset for offset in offsets)
+        f.write(f"trailer\n<< /Size {len(offsets) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode())
+
+
+def write_zip(images, output):
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_STORED) as zf:
+        for name, data in images:
+            zf.writestr(f"{name}.png", data)
+
+
+def export_report(model_paths, output, max_workers=None):
+    """{모델 이름: 요약 엑셀} → output(.pdf / .zip). 작성한 차트 수 반환"""
+    ext = os.path.splitext(output)[1].lower()
+    if ext not in (".pdf", ".zip"):
+        raise ValueError(f"지원하지 않는 리포트 형식: {ext} (.pdf / .zip)")
+
+    jobs = []
+    for model, excel_path in model_paths.items():
+        _, heatmap_df_weight, heatmap_df_avg = load_summary_matrices(excel_path)
+        jobs.extend(report_jobs(_safe_name(model), heatmap_df_weight, heatmap_df_avg))
+    images = render_jobs(jobs, max_workers=max_workers)
+
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with stage("report.write"):
+        if ext == ".pdf":
+            write_pdf(images, output)
+        else:
+            write_zip(images, output)
+    return len(images)
@@ -0,0 +1,164 @@
+"""notMC_parsing 의 grouped_data(dict-of-dicts) 를 대체하는 structure-of-arrays 샘플 저장소
+
+샘플 단위: sample_ids(문자열), risk(uint16 코드), prompt(uint16 코드)
+샘플×epoch 단위: sample_index(int32), epoch(int16), grade(int8, 잘못된 채점은 -1)
+input 원문은 들고 있지 않고, 필요할 때 아카이브에서 한 번만 읽어서 side table 로 보관한다.
+"""
+import threading
+from array import array
+
+import numpy as np
+
+from instrument import stage
+from utils import VALID_GRADES, fold_prompt_ids, iter_eval_summaries, split_sample_ids
+
+INVALID_GRADE = -1
+_GRADE_CODES = {grade: int(grade) for grade in VALID_GRADES}
+
+
+def grade_codes(values):
+    """채점 값 문자열 → grade 코드 (int8, 잘못된 채점은 INVALID_GRADE)"""
+    return np.array([_GRADE_CODES.get(value, INVALID_GRADE) for value in values], dtype=np.int8)
+
+
+def grade_scores(grade):
+    """grade 코드 → 점수 (float64). notMC_parsing 과 같이 잘못된 채점은 0점 (epoch 수에는 포함)"""
+    return np.where(grade == INVALID_GRADE, 0, grade).astype(np.float64)
+
+
+class SampleStore:
+    def __init__(self, sample_ids, risk, prompt, sample_index, epoch, grade, risk_ids, prompt_ids, eval_path=None):
+        self.sample_ids = sample_ids
+        self.risk = risk
+        self.prompt = prompt
+        self.sample_index = sample_index
+        self.epoch = epoch
+        self.grade = grade
+        self.risk_ids = risk_ids
+        self.prompt_ids = prompt_ids
+        self.eval_path = eval_path
+        self._inputs = None
+        self._inputs_lock = threading.Lock()
+
+    @classmethod
+    def from_eval(cls, eval_path):
+        """summaries.json 을 스트리밍하면서 바로 배열에 채워 넣음 (샘플별 dict 를 만들지 않음)
+
+        risk / prompt 코드는 목록을 고정하지 않고 split_sample_ids 로 데이터에서 찾는다
+        (r001 같은 세 자리 위험코드, 새 프롬프트 변형도 그대로 유지). 형식이 맞지 않는 id 는 제외
+        """
+        index_of = {}
+        sample_ids = []
+        sample_index = array("i")
+        epoch = array("h")
+        grade = array("b")
+
+        with stage("sample_store.load"):
+            for item in iter_eval_summaries(eval_path):
+                id_ = item["id"]
+                i = index_of.get(id_)
+                if i is None:
+                    i = index_of[id_] = len(sample_ids)
+                    sample_ids.append(id_)
+                value = item.get("scores", {}).get("model_graded_qa", {}).get("value")
+                sample_index.append(i)
+                epoch.append(item["epoch"])
+                grade.append(_GRADE_CODES.get(value, INVALID_GRADE))
+
+            sample_ids = np.array(sample_ids, dtype=str)
+            sample_index = np.frombuffer(sample_index, dtype=np.int32)
+            epoch = np.frombuffer(epoch, dtype=np.int16)
+            grade = np.frombuffer(grade, dtype=np.int8)
+
+            risk_body, prompt_body, matched = split_sample_ids(sample_ids)
+            if not matched.all():
+                # 형식이 다른 샘플과 그 epoch 행을 빼고 샘플 번호를 다시 매김
+                new_index = np.cumsum(matched) - 1
+                rows = matched[sample_index]
+                sample_index = new_index[sample_index[rows]].astype(np.int32)
+                epoch, grade = epoch[rows], grade[rows]
+                sample_ids, risk_body, prompt_body = sample_ids[matched], risk_body[matched], prompt_body[matched]
+            # 등장 순서대로 코드 부여, prompt 코드는 기존과 같이 'p' 접두어 포함 (pRP, pRPemo ...)
+            risk_ids, risk = _factorize_in_order(risk_body.astype(str))
+            prompt_ids, prompt = _factorize_in_order(np.strings.add("p", prompt_body.astype(str)))
+
+        return cls(
+            sample_ids=sample_ids,
+            risk=risk.astype(np.uint16),
+            prompt=prompt.astype(np.uint16),
+            sample_index=sample_index.copy(),
+            epoch=epoch.copy(),
+            grade=grade.copy(),
+            risk_ids=risk_ids.astype(object),
+            prompt_ids=prompt_ids.astype(object),
+            eval_path=eval_path,
+        )
+
+    def __len__(self):
+        return len(self.sample_ids)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.sample_ids, self.risk, self.prompt, self.sample_index, self.epoch, self.grade))
+
+    def scores(self):
+        """샘플×epoch 행별 점수 (grade_scores)"""
+        return grade_scores(self.grade)
+
+    def avg_scores(self):
+        """샘플별 epoch 평균 점수. 잘못된 채점은 0점으로 분모에만 포함"""
+        n = len(self.sample_ids)
+        score_sum = np.bincount(self.sample_index, weights=self.scores(), minlength=n)
+        epoch_count = np.bincount(self.sample_index, minlength=n)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(epoch_count > 0, score_sum / np.maximum(epoch_count, 1), np.nan)
+
+    def invalid_sample_ids(self):
+        """[GRADE 오류 발생] 에 해당하는 샘플 id 목록"""
+        return self.sample_ids[np.unique(self.sample_index[self.grade == INVALID_GRADE])]
+
+    def cell_layout(self):
+        """RP 파생형을 RP 로 통합한 (risk, prompt) 셀 배치: (샘플별 셀 번호, risk_ids, prompt_ids)
+
+        셀 번호 = risk 코드 × len(prompt_ids) + prompt 코드. prompt_ids 는 정렬 순서이고 'p' 접두어가 없음 (RP, MC ...)
+        """
+        folded = fold_prompt_ids(np.strings.slice(self.prompt_ids.astype(str), 1, None))
+        prompt_codes, prompt_ids = _factorize(folded)
+        cell = self.risk.astype(np.intp) * len(prompt_ids) + prompt_codes[self.prompt]
+        return cell, self.risk_ids, prompt_ids.astype(object)
+
+    def cell_scores(self):
+        """{(risk_id, prompt_id): (score_sum, count)} (accumulate_cell_scores 와 같은 형식, RP 파생형은 RP 로 통합)"""
+        cell, risk_ids, prompt_ids = self.cell_layout()
+        n_prompt = len(prompt_ids)
+        size = len(risk_ids) * n_prompt
+        score_sum = np.bincount(cell, weights=self.avg_scores(), minlength=size)
+        score_count = np.bincount(cell, minlength=size)
+        return {
+            (risk_ids[flat // n_prompt], prompt_ids[flat % n_prompt]): (float(score_sum[flat]), int(score_count[flat]))
+            for flat in np.flatnonzero(score_count)
+        }
+
+    def input_text(self, sample_id):
+        """input 원문 (처음 호출 시 아카이브를 한 번 더 읽어서 id → input side table 을 만듦)"""
+        with self._inputs_lock:
+            if self._inputs is None:
+                if self.eval_path is None:
+                    raise ValueError("eval_path 가 없어서 input 을 불러올 수 없습니다")
+                with stage("sample_store.load_inputs"):
+                    self._inputs = {item["id"]: item["input"] for item in iter_eval_summaries(self.eval_path)}
+        return self._inputs.get(sample_id)
+
+
+def _factorize(values):
+    uniques, codes = np.unique(values, return_inverse=True)
+    return codes.astype(np.intp), uniques
+
+
+def _factorize_in_order(values):
+    # np.unique 는 정렬 순서로 코드를 주므로, 처음 등장한 순서로 다시 매김
+    uniques, first, codes = np.unique(values, return_index=True, return_inverse=True)
+    order = np.argsort(first, kind="stable")
+    rank = np.empty(len(order), dtype=np.intp)
+    rank[order] = np.arange(len(order))
+    return uniques[order], rank[codes]
@@ -0,0 +1,55 @@
+import json
+import os
+import sys
+import types
+import zipfile
+
+import pytest
+
+# 저장소 최상위 모듈(utils, sample_store, bench ...)을 그대로 import
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import bench  # noqa: E402
+import utils  # noqa: E402
+
+# 빠른 경로(np.strings)로는 안 맞고 SAMPLE_ID_PATTERN 으로 다시 확인해야 하는 id 와 아예 안 맞는 id
+FALLBACK_IDS = ["r03_t02_pMC_00000007_retry", "r11_t01_pRPemo_12.json", "r07_t1_pCT_5x"]
+UNMATCHED_IDS = ["garbage", "r02_pMC_001", "x01_t01_pMC_001", "r01_t01_MC_001"]
+
+
+def write_eval(path, items):
+    """summaries.json 하나만 담은 .eval(zip)"""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("summaries.json", json.dumps(items, ensure_ascii=False))
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def mixed_eval_log(tmp_path_factory):
+    """bench 합성 로그(잘못된 채점 5%) + 정규식 fallback / 미일치 id 를 섞은 .eval"""
+    workdir = tmp_path_factory.mktemp("eval")
+    synthetic = bench.write_synthetic_eval(str(workdir / "synthetic.eval"), 3000, epochs=2, invalid_rate=0.05)
+    items = list(utils.iter_eval_summaries(synthetic))
+    for n, sample_id in enumerate(FALLBACK_IDS + UNMATCHED_IDS):
+        for epoch in (1, 2):
+            items.append({"id": sample_id, "epoch": epoch, "input": "추가 샘플",
+                          "scores": {"model_graded_qa": {"value": str((n + epoch) % 5 + 1)}}})
+    return write_eval(workdir / "mixed.eval", items)
+
+
+@pytest.fixture
+def streamlit_like_main(tmp_path, monkeypatch):
+    """Streamlit 처럼 __main__ 을 app.py 스크립트 모듈로 바꿔 둠. 스크립트가 실행되면 marker 파일을 남김
+
+    Streamlit 은 스크립트 실행이 끝나면 스크립트 디렉터리를 sys.path 에서 빼므로 저장소 디렉터리도 sys.path 에서 뺌
+    """
+    marker = tmp_path / "app_imported"
+    script = tmp_path / "app.py"
+    script.write_text(f"open({str(marker)!r}, 'a').write(__name__ + '\\n')\n")
+    fake_main = types.ModuleType("__main__")
+    fake_main.__file__ = str(script)
+    fake_main.__spec__ = None
+    monkeypatch.setitem(sys.modules, "__main__", fake_main)
+    monkeypatch.setattr(sys, "path", [p for p in sys.path if os.path.abspath(p or os.curdir) != REPO_DIR])
+    return fake_main, marker
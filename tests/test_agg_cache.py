@@ -0,0 +1,109 @@
+"""load_aggregates 캐시 정리: 내용이 같은 로그가 공유하는 <sha1>.npz, 사라진 로그, manifest 에만 남은 캐시 파일"""
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+import bench
+import utils
+
+
+def _write_log(path, seed):
+    return bench.write_synthetic_eval(str(path), 200, epochs=2, seed=seed)
+
+
+def _manifest(cache_dir):
+    with open(cache_dir / "manifest.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _npz_files(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if name.endswith(".npz"))
+
+
+def _load(log_dir, cache_dir):
+    aggregates = utils.load_aggregates(str(log_dir), cache_dir=str(cache_dir), max_workers=1)
+    # 캐시에서 읽었든 새로 파싱했든 aggregate_eval_file 과 같아야 함
+    for eval_path, aggregate in aggregates.items():
+        expected = utils.aggregate_eval_file(eval_path)
+        assert set(aggregate) == set(expected)
+        for name, values in expected.items():
+            np.testing.assert_array_equal(aggregate[name], values)
+    return aggregates
+
+
+@pytest.fixture
+def shared_logs(tmp_path):
+    """내용이 같은 로그 두 개 (a, b) → 캐시 파일 하나를 공유"""
+    log_dir, cache_dir = tmp_path / "log", tmp_path / "cache"
+    log_dir.mkdir()
+    _write_log(log_dir / "a.eval", seed=0)
+    shutil.copyfile(log_dir / "a.eval", log_dir / "b.eval")
+    _load(log_dir, cache_dir)
+    entries = _manifest(cache_dir)
+    assert len(entries) == 2
+    assert len({entry["cache_file"] for entry in entries.values()}) == 1
+    return log_dir, cache_dir
+
+
+def test_changed_log_keeps_shared_cache(shared_logs):
+    log_dir, cache_dir = shared_logs
+    (shared,) = _npz_files(cache_dir)
+
+    # a 만 바뀌면 b 가 아직 쓰는 공유 캐시는 남아 있어야 함
+    _write_log(log_dir / "a.eval", seed=1)
+    _load(log_dir, cache_dir)
+    entries = _manifest(cache_dir)
+    assert entries[str(log_dir / "b.eval")]["cache_file"] == shared
+    assert entries[str(log_dir / "a.eval")]["cache_file"] != shared
+    assert len(_npz_files(cache_dir)) == 2
+
+    # b 도 바뀌면 아무도 쓰지 않는 공유 캐시는 지움
+    _write_log(log_dir / "b.eval", seed=2)
+    _load(log_dir, cache_dir)
+    assert shared not in _npz_files(cache_dir)
+    assert _npz_files(cache_dir) == sorted(entry["cache_file"] for entry in _manifest(cache_dir).values())
+
+
+def test_removed_log_prunes_manifest_and_cache(shared_logs):
+    log_dir, cache_dir = shared_logs
+    (shared,) = _npz_files(cache_dir)
+    _write_log(log_dir / "c.eval", seed=3)
+    _load(log_dir, cache_dir)
+    own = _manifest(cache_dir)[str(log_dir / "c.eval")]["cache_file"]
+
+    # 혼자 쓰던 캐시는 로그와 같이 사라짐
+    os.remove(log_dir / "c.eval")
+    assert set(_load(log_dir, cache_dir)) == {str(log_dir / "a.eval"), str(log_dir / "b.eval")}
+    assert str(log_dir / "c.eval") not in _manifest(cache_dir)
+    assert _npz_files(cache_dir) == [shared]
+    assert own != shared
+
+    # 공유 캐시는 마지막 로그가 사라질 때 지움
+    os.remove(log_dir / "a.eval")
+    _load(log_dir, cache_dir)
+    assert list(_manifest(cache_dir)) == [str(log_dir / "b.eval")]
+    assert _npz_files(cache_dir) == [shared]
+    os.remove(log_dir / "b.eval")
+    assert _load(log_dir, cache_dir) == {}
+    assert _manifest(cache_dir) == {}
+    assert _npz_files(cache_dir) == []
+
+
+def test_missing_cache_file_is_rebuilt(shared_logs, capsys):
+    log_dir, cache_dir = shared_logs
+    (shared,) = _npz_files(cache_dir)
+    os.remove(cache_dir / shared)
+    capsys.readouterr()
+
+    # manifest 에는 남아 있지만 파일이 없으면 다시 파싱해서 같은 이름으로 다시 만듦
+    _load(log_dir, cache_dir)
+    assert "0개 재사용, 2개 새로 파싱" in capsys.readouterr().out
+    assert _npz_files(cache_dir) == [shared]
+    assert {entry["cache_file"] for entry in _manifest(cache_dir).values()} == {shared}
+
+    # 다시 읽으면 캐시를 그대로 씀
+    _load(log_dir, cache_dir)
+    assert "2개 재사용, 0개 새로 파싱" in capsys.readouterr().out
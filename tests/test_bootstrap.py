@@ -0,0 +1,34 @@
+"""bootstrap 셀 평균이 SampleStore 집계와 같고, 저장해 둔 재표본으로 신뢰수준만 바꿔도 같은 구간이 나오는지 확인"""
+import numpy as np
+import pytest
+
+import bootstrap
+from sample_store import SampleStore
+
+
+@pytest.fixture(scope="module")
+def store(mixed_eval_log):
+    return SampleStore.from_eval(mixed_eval_log)
+
+
+@pytest.mark.parametrize("resample_epochs", [True, False])
+def test_cell_intervals_reuse_resamples(store, resample_epochs):
+    resampled = bootstrap.resample_cells(store, n_boot=400, seed=0, resample_epochs=resample_epochs)
+    narrow = bootstrap.cell_intervals(resampled, 0.8)
+    wide = bootstrap.cell_intervals(resampled, 0.99)
+
+    direct = bootstrap.bootstrap_cells(store, n_boot=400, confidence=0.8, seed=0, resample_epochs=resample_epochs)
+    for name in ("mean", "low", "high", "count"):
+        np.testing.assert_array_equal(narrow[name], direct[name])
+
+    present = ~np.isnan(narrow["mean"])
+    assert (wide["low"][present] <= narrow["low"][present]).all()
+    assert (narrow["high"][present] <= wide["high"][present]).all()
+
+
+def test_bootstrap_mean_matches_cell_scores(store):
+    result = bootstrap.bootstrap_cells(store, n_boot=50)
+    for (risk_id, prompt_id), (score_sum, count) in store.cell_scores().items():
+        r, p = result["risk_ids"].index(risk_id), result["prompt_ids"].index(prompt_id)
+        assert result["count"][r, p] == count
+        assert result["mean"][r, p] == pytest.approx(score_sum / count)
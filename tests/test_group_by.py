@@ -0,0 +1,81 @@
+"""split_sample_ids 와 bincount 엔진이 처음 구현(샘플마다 re.match + 중첩 dict 누적)과 같은 값을 내는지 확인"""
+import re
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+import utils
+from conftest import FALLBACK_IDS, UNMATCHED_IDS
+
+
+def baseline_generate(prompt_types, risk_types, sorted_grouped_data):
+    # 처음 커밋의 utils.generate_dataframe_with_exclusions (출력만 제거)
+    risk_prompt_matrix = defaultdict(dict)
+    risk_bar_data = defaultdict(list)
+    prompt_bar_data = defaultdict(list)
+    score_sum = defaultdict(lambda: defaultdict(float))
+    score_count = defaultdict(lambda: defaultdict(int))
+
+    for key, value in sorted_grouped_data.items():
+        match = re.match(r"(r\d+)_t\d+_p(\w+)_\d+", key)
+        if match:
+            risk_id = match.group(1)
+            prompt_id = utils.normalize_prompt_id(match.group(2))
+            score = value.get("avg_score")
+            if score is None:
+                continue
+            risk_name = risk_types.get(risk_id, risk_id)
+            prompt_name = prompt_types.get(prompt_id, prompt_id)
+            score_sum[risk_name][prompt_name] += score
+            score_count[risk_name][prompt_name] += 1
+            risk_bar_data[risk_name].append((prompt_name, score))
+            prompt_bar_data[prompt_name].append((risk_name, score))
+
+    for r in score_sum:
+        for p in score_sum[r]:
+            risk_prompt_matrix[r][p] = score_sum[r][p] / score_count[r][p]
+    return risk_prompt_matrix, risk_bar_data, prompt_bar_data
+
+
+def assert_same_matrix(actual, expected):
+    assert {r: set(row) for r, row in actual.items()} == {r: set(row) for r, row in expected.items()}
+    for r, row in expected.items():
+        for p, value in row.items():
+            assert actual[r][p] == pytest.approx(value)
+
+
+def test_split_sample_ids_matches_regex():
+    sample_ids = ["r02_t01_pRPemo_001", "r35_t09_pMC_00012345", "r001_t1_pRP_x_7", "r10_t03_pQO_0"]
+    sample_ids += FALLBACK_IDS + UNMATCHED_IDS
+    risk, prompt, matched = utils.split_sample_ids(sample_ids)
+
+    for i, sample_id in enumerate(sample_ids):
+        match = utils.SAMPLE_ID_PATTERN.match(sample_id)
+        assert bool(matched[i]) == bool(match), sample_id
+        if match:
+            assert (str(risk[i]), str(prompt[i])) == match.groups()
+
+
+def test_generate_dataframe_matches_dict_loop(mixed_eval_log):
+    sorted_grouped_data = utils.parse_eval_file(mixed_eval_log)
+    expected = baseline_generate(utils.PROMPT_TYPES, utils.RISK_TYPES, sorted_grouped_data)
+    actual = utils.generate_dataframe_with_exclusions(utils.PROMPT_TYPES, utils.RISK_TYPES, sorted_grouped_data)
+
+    assert_same_matrix(actual[0], expected[0])
+    # 바차트 데이터는 그룹 안에서 샘플 순서까지 같아야 함
+    for new, old in zip(actual[1:], expected[1:]):
+        assert set(new) == set(old)
+        for name, (labels, scores) in new.items():
+            assert list(labels) == [label for label, _ in old[name]]
+            np.testing.assert_allclose(scores, [score for _, score in old[name]])
+
+
+def test_accumulate_cell_scores_matches_dict_loop(mixed_eval_log):
+    sorted_grouped_data = utils.parse_eval_file(mixed_eval_log)
+    # 이름 매핑 없이 돌리면 baseline 의 키가 곧 (risk_id, prompt_id)
+    expected, _, _ = baseline_generate({}, {}, sorted_grouped_data)
+    means = defaultdict(dict)
+    for (risk_id, prompt_id), (score_sum, count) in utils.accumulate_cell_scores(sorted_grouped_data).items():
+        means[risk_id][prompt_id] = score_sum / count
+    assert_same_matrix(means, expected)
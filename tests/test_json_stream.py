@@ -0,0 +1,65 @@
+"""iter_json_array / iter_eval_summaries 가 json.load 와 같은 원소를 돌려주는지 확인 (청크 경계에 걸친 멀티바이트 문자 포함)"""
+import io
+import json
+import zipfile
+
+import pytest
+
+import utils
+
+MULTIBYTE_ITEMS = [
+    {"id": "r01_t01_pMC_001", "input": "한국어 입력 🙂 테스트"},
+    {"id": "r02_t01_pRPemo_002", "input": "é" * 13 + "🚀" * 5, "scores": {"model_graded_qa": {"value": "3"}}},
+    [],
+    "가나다",
+    {"id": "r03_t02_pQO_003", "input": "끝 ✅", "nested": [{"k": "값"}, 1.5, None]},
+]
+CHUNK_SIZES = [1, 2, 3, 5, 7, 16, 1 << 20]
+
+
+def _array_bytes(items):
+    return ("[\r\n  " + ",\n  ".join(json.dumps(item, ensure_ascii=False) for item in items) + "\n]").encode("utf-8")
+
+
+def _text_stream(data):
+    return io.TextIOWrapper(io.BytesIO(data), encoding="utf-8", newline="")
+
+
+def _write_eval(path, items):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("summaries.json", json.dumps(items, ensure_ascii=False))
+    return path
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_iter_json_array_matches_json_load(chunk_size):
+    data = _array_bytes(MULTIBYTE_ITEMS)
+    assert list(utils.iter_json_array(_text_stream(data), chunk_size=chunk_size)) == json.loads(data)
+
+
+@pytest.mark.parametrize("text", ["", "[]", " [ ] "])
+def test_iter_json_array_empty(text):
+    assert list(utils.iter_json_array(io.StringIO(text))) == []
+
+
+def test_iter_eval_summaries_reads_archive_in_place(tmp_path):
+    path = _write_eval(str(tmp_path / "log.eval"), MULTIBYTE_ITEMS)
+    assert list(utils.iter_eval_summaries(path)) == MULTIBYTE_ITEMS
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_iter_json_array_byte_offsets(chunk_size):
+    data = _array_bytes(MULTIBYTE_ITEMS)
+    results = list(utils.iter_json_array(_text_stream(data), chunk_size=chunk_size, with_offsets=True))
+    assert [item for item, _, _ in results] == MULTIBYTE_ITEMS
+    # 오프셋은 문자 위치가 아니라 UTF-8 byte 위치
+    for item, start, end in results:
+        assert json.loads(data[start:end].decode("utf-8")) == item
+
+
+def test_iter_eval_summaries_byte_offsets(tmp_path):
+    path = _write_eval(str(tmp_path / "offsets.eval"), MULTIBYTE_ITEMS)
+    with zipfile.ZipFile(path) as zf:
+        data = zf.read("summaries.json")
+    for item, start, end in utils.iter_eval_summaries(path, with_offsets=True):
+        assert json.loads(data[start:end].decode("utf-8")) == item
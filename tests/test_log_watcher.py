@@ -0,0 +1,49 @@
+"""LogWatcher 가 캐시 seed + polling 으로 ingest_eval_logs 와 같은 집계를 만들고, 워커가 __main__ 스크립트를 실행하지 않는지 확인"""
+import os
+import time
+
+import pytest
+
+import bench
+import utils
+from log_watcher import LogWatcher
+
+
+def _write_old_log(path, seed):
+    # 한 polling 주기 이상 지난 로그로 만들어서 바로 처리되게 함
+    bench.write_synthetic_eval(str(path), 300, epochs=2, seed=seed)
+    old = time.time() - 60
+    os.utime(path, (old, old))
+
+
+def _assert_same_cells(actual, expected):
+    assert set(actual) == set(expected)
+    for key, (score_sum, count) in expected.items():
+        assert actual[key][1] == count
+        assert actual[key][0] == pytest.approx(score_sum)
+
+
+def test_watcher_seed_and_scan_in_pool(tmp_path, streamlit_like_main):
+    _, marker = streamlit_like_main
+    log_dir = tmp_path / "log"
+    log_dir.mkdir()
+    for seed in (0, 1):
+        _write_old_log(log_dir / f"seed_{seed}.eval", seed)
+
+    watcher = LogWatcher(str(log_dir), interval=0.2, max_workers=2, cache_dir=str(tmp_path / "cache")).start()
+    try:
+        # 시작할 때 기존 로그는 load_aggregates 풀로 채움
+        version = watcher.wait_for_update(0, timeout=60)
+        _assert_same_cells(watcher.cell_scores(), utils.ingest_eval_logs(str(log_dir), max_workers=1))
+
+        # 새 로그 두 개는 watcher 의 상주 풀에서 파싱
+        for seed in (2, 3):
+            _write_old_log(log_dir / f"new_{seed}.eval", seed)
+        deadline = time.time() + 60
+        while len(watcher.logs()) < 4 and time.time() < deadline:
+            version = watcher.wait_for_update(version, timeout=1)
+        assert watcher._executor is not None
+        _assert_same_cells(watcher.cell_scores(), utils.ingest_eval_logs(str(log_dir), max_workers=1))
+    finally:
+        watcher.stop()
+    assert not marker.exists()
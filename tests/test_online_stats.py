@@ -0,0 +1,116 @@
+"""OnlineAggregator 의 Chan 병합: 로그를 워커/배치로 어떻게 나눠도 셀 통계가 NumPy 로 직접 계산한 값과 같은지 확인"""
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+import utils
+from online_stats import OnlineAggregator, RunningStats
+
+
+def _items(eval_path):
+    return [(item["id"], item["epoch"], item.get("scores", {}).get("model_graded_qa", {}).get("value"))
+            for item in utils.iter_eval_summaries(eval_path)]
+
+
+def _direct_summary(logs):
+    """{source: [(id, epoch, grade)]} → 셀별 mean/var (샘플 평균 기준), epoch_var (epoch 점수 전체 기준)"""
+    sample_scores = defaultdict(list)
+    cell_of = {}
+    for source, items in logs.items():
+        for sample_id, _, grade in items:
+            match = utils.SAMPLE_ID_PATTERN.match(sample_id)
+            if match is None:
+                continue
+            key = (source, sample_id)
+            cell_of[key] = (match.group(1), utils.normalize_prompt_id(match.group(2)))
+            sample_scores[key].append(float(grade) if grade in utils.VALID_GRADES else 0.0)
+
+    sample_means, epoch_scores = defaultdict(list), defaultdict(list)
+    for key, scores in sample_scores.items():
+        sample_means[cell_of[key]].append(np.mean(scores))
+        epoch_scores[cell_of[key]].extend(scores)
+    return {
+        cell: {
+            "count": len(means),
+            "mean": np.mean(means),
+            "var": np.var(means, ddof=1) if len(means) > 1 else np.nan,
+            "epoch_count": len(epoch_scores[cell]),
+            "epoch_var": np.var(epoch_scores[cell], ddof=1) if len(epoch_scores[cell]) > 1 else np.nan,
+        }
+        for cell, means in sample_means.items()
+    }
+
+
+def _aggregate(chunks, batch_size):
+    """워커별 (source, items) 묶음을 batch_size 단위로 add 한 뒤 하나로 merge"""
+    merged = OnlineAggregator()
+    for chunk in chunks:
+        partial = OnlineAggregator()
+        for source, items in chunk:
+            for start in range(0, len(items), batch_size):
+                batch = items[start:start + batch_size]
+                partial.add([sample_id for sample_id, _, _ in batch], [grade for _, _, grade in batch], source)
+        merged.merge(partial)
+    return merged
+
+
+def _assert_matches_direct(aggregator, logs):
+    expected = _direct_summary(logs)
+    actual = aggregator.cell_summary()
+    assert set(actual) == set(expected)
+    for cell, stats in expected.items():
+        assert actual[cell]["count"] == stats["count"]
+        assert actual[cell]["epoch_count"] == stats["epoch_count"]
+        for name in ("mean", "var", "epoch_var"):
+            np.testing.assert_allclose(actual[cell][name], stats[name], rtol=1e-10, atol=1e-12, err_msg=f"{cell} {name}")
+
+
+@pytest.fixture(scope="module")
+def items(mixed_eval_log):
+    # 샘플 순서를 섞어서 같은 샘플의 epoch 가 서로 다른 워커/배치로 흩어지게 함
+    items = _items(mixed_eval_log)
+    order = np.random.default_rng(0).permutation(len(items))
+    return [items[i] for i in order]
+
+
+@pytest.mark.parametrize("n_workers", [1, 3])
+@pytest.mark.parametrize("batch_size", [7, 500, 100_000])
+def test_split_log_matches_direct(items, n_workers, batch_size):
+    chunks = [[("log", items[w::n_workers])] for w in range(n_workers)]
+    _assert_matches_direct(_aggregate(chunks, batch_size), {"log": items})
+
+
+def test_same_sample_gains_epochs_across_batches(items):
+    # epoch 1 만 먼저, epoch 2 는 다음 배치 / 다른 워커에서 같은 (source, id) 로 들어옴
+    by_epoch = [[item for item in items if item[1] == epoch] for epoch in (1, 2)]
+    single = _aggregate([[("log", by_epoch[0] + by_epoch[1])]], batch_size=len(by_epoch[0]))
+    split = _aggregate([[("log", by_epoch[0])], [("log", by_epoch[1])]], batch_size=1000)
+    for aggregator in (single, split):
+        assert len(aggregator.sample_keys) == len({sample_id for sample_id, _, _ in by_epoch[0]
+                                                   if utils.SAMPLE_ID_PATTERN.match(sample_id)})
+        _assert_matches_direct(aggregator, {"log": items})
+
+    # 다른 source 의 같은 id 는 다른 샘플
+    two_logs = _aggregate([[("a", items)], [("b", by_epoch[1]), ("b", by_epoch[0])]], batch_size=999)
+    _assert_matches_direct(two_logs, {"a": items, "b": items})
+
+
+def test_running_stats_merge_matches_numpy():
+    rng = np.random.default_rng(1)
+    index = rng.integers(0, 5, 2000)
+    values = rng.normal(3, 2, 2000)
+    parts = []
+    for part_index, part_values in zip(np.array_split(index, 4), np.array_split(values, 4)):
+        stats = RunningStats()
+        for batch in np.array_split(np.arange(len(part_index)), 3):
+            stats.update(part_index[batch], part_values[batch])
+        parts.append(stats)
+    merged = RunningStats()
+    for stats in parts:
+        merged.merge(stats)
+
+    for i in range(5):
+        np.testing.assert_allclose(merged.mean[i], values[index == i].mean(), rtol=1e-12)
+        np.testing.assert_allclose(merged.variance()[i], values[index == i].var(ddof=1), rtol=1e-10)
+        assert merged.count[i] == (index == i).sum()
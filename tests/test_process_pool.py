@@ -0,0 +1,27 @@
+"""utils.process_pool 워커가 부모의 __main__ 스크립트(Streamlit 아래에서는 app.py)를 다시 실행하지 않는지 확인"""
+import sys
+
+import utils
+
+
+def main_script(_):
+    # 워커에서 실행: spawn 이 __main__ 스크립트를 다시 실행했다면 __mp_main__ 에 그 경로가 남음
+    return getattr(sys.modules.get("__mp_main__"), "__file__", None)
+
+
+def test_parallel_map_workers_skip_main_script(streamlit_like_main):
+    fake_main, marker = streamlit_like_main
+    assert utils.parallel_map(main_script, range(4), max_workers=2) == [None] * 4
+    assert not marker.exists()
+    # 워커를 띄운 뒤에는 원래 __main__ 이 그대로 있어야 함
+    assert sys.modules["__main__"] is fake_main
+
+
+def test_process_pool_late_workers_skip_main_script(streamlit_like_main):
+    # spawn 풀은 submit 할 때마다 워커를 늘리므로 풀을 만든 뒤에 뜨는 워커도 확인
+    _, marker = streamlit_like_main
+    with utils.process_pool(2) as executor:
+        first = executor.submit(main_script, 0).result()
+        rest = [f.result() for f in [executor.submit(main_script, i) for i in range(1, 4)]]
+    assert [first] + rest == [None] * 4
+    assert not marker.exists()
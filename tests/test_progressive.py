@@ -0,0 +1,54 @@
+"""ProgressiveHeatmap 의 t 구간: 표본이 적은 pilot 초반에는 전체 범위, 끝나면 정확한 셀 평균"""
+import json
+import zipfile
+
+import numpy as np
+import pytest
+
+import bench
+import utils
+from progressive import MIN_INTERVAL_SAMPLES, SCORE_RANGE, ProgressiveHeatmap, t_quantile
+from sample_store import SampleStore
+
+
+@pytest.mark.parametrize("df, expected", [(1, 12.706), (2, 4.303), (3, 3.182), (4, 2.776), (9, 2.262), (29, 2.045), (5000, 1.960)])
+def test_t_quantile_matches_table(df, expected):
+    assert t_quantile(0.95, df) == pytest.approx(expected, abs=1e-3)
+
+
+@pytest.fixture(scope="module")
+def member_log(tmp_path_factory):
+    """samples/<id>_epoch_<n>.json member 가 있는 로그 (pilot 단계를 거침)"""
+    workdir = tmp_path_factory.mktemp("progressive")
+    source = bench.write_synthetic_eval(str(workdir / "source.eval"), 1500, epochs=3, seed=7)
+    path = str(workdir / "members.eval")
+    with zipfile.ZipFile(source) as zin, zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zout:
+        zout.writestr("summaries.json", zin.read("summaries.json"))
+        for item in utils.iter_eval_summaries(source):
+            zout.writestr(f"samples/{item['id']}_epoch_{item['epoch']}.json", json.dumps(item))
+    return path
+
+
+def _cells(estimate):
+    # 로그에 없는 (risk, prompt) 조합(NaN)은 건너뜀
+    for i, risk_id in enumerate(estimate["risk_ids"]):
+        for j, prompt_id in enumerate(estimate["prompt_ids"]):
+            if not np.isnan(estimate["mean"][i, j]):
+                yield (risk_id, prompt_id), estimate["mean"][i, j], estimate["low"][i, j], estimate["high"][i, j]
+
+
+def test_small_pilot_shows_full_range_then_exact(member_log):
+    progressive = ProgressiveHeatmap(member_log, batch_size=500)
+    progressive.step()      # 목차
+    progressive.step()      # pilot 2개씩
+    assert progressive._pilot_taken < MIN_INTERVAL_SAMPLES
+    for key, mean, low, high in _cells(progressive.estimate(0.95)):
+        if progressive.totals[key] > progressive._pilot_taken:
+            # 표본 2개로는 분산을 믿을 수 없으므로 폭 0 이나 좁은 구간 대신 점수 범위 전체
+            assert (low, high) == SCORE_RANGE
+
+    while progressive.step():
+        pass
+    exact = {key: score_sum / count for key, (score_sum, count) in SampleStore.from_eval(member_log).cell_scores().items()}
+    for key, mean, low, high in _cells(progressive.estimate(0.95)):
+        assert low == mean == high == pytest.approx(exact[key])
@@ -0,0 +1,43 @@
+"""write_pdf 결과가 PDF 파서로 읽히고, 페이지마다 원본 PNG 픽셀이 손실 없이 들어가는지 확인"""
+import io
+import zlib
+
+import numpy as np
+import pytest
+from PIL import Image, PdfParser
+
+import report
+
+
+def _png(width, height, mode, seed):
+    pixels = np.random.default_rng(seed).integers(0, 256, (height, width, len(mode)), dtype=np.uint8)
+    out = io.BytesIO()
+    Image.fromarray(pixels, mode).save(out, format="PNG")
+    return out.getvalue()
+
+
+def test_write_pdf_roundtrip(tmp_path):
+    images = [("a/heatmap", _png(40, 30, "RGBA", 0)), ("a/bar", _png(25, 50, "RGB", 1)), ("b/bar", _png(7, 3, "RGBA", 2))]
+    output = tmp_path / "report.pdf"
+    report.write_pdf(images, str(output), dpi=72)
+
+    pdf = PdfParser.PdfParser(str(output))
+    try:
+        assert len(pdf.pages) == len(images)
+        for page_ref, (_, data) in zip(pdf.pages, images):
+            page = pdf.read_indirect(page_ref)
+            expected = Image.open(io.BytesIO(data))
+            # dpi=72 이면 페이지 크기(pt) = 픽셀 크기
+            assert [float(v) for v in page[b"MediaBox"]] == [0, 0, *expected.size]
+            image_ref = page[b"Resources"][b"XObject"][b"chart"]
+            stream = pdf.read_indirect(image_ref)
+            assert stream.dictionary.Filter == b"FlateDecode"
+            assert (stream.dictionary.Width, stream.dictionary.Height) == expected.size
+            assert zlib.decompress(stream.buf) == expected.convert("RGB").tobytes()
+    finally:
+        pdf.close()
+
+
+def test_write_pdf_requires_images(tmp_path):
+    with pytest.raises(ValueError):
+        report.write_pdf([], str(tmp_path / "empty.pdf"))
@@ -0,0 +1,50 @@
+"""SampleStore 가 parse_eval_file 의 grouped_data(dict-of-dicts) 와 같은 샘플 / 점수 / 셀 집계를 내는지 확인"""
+import numpy as np
+import pytest
+
+import utils
+from sample_store import SampleStore
+
+
+@pytest.fixture(scope="module")
+def stores(mixed_eval_log):
+    return SampleStore.from_eval(mixed_eval_log), utils.parse_eval_file(mixed_eval_log)
+
+
+def test_sample_scores_match_grouped_data(stores):
+    store, grouped = stores
+    # parse_eval_file 은 EVAL_ID_PATTERN 으로 더 느슨하게 고르므로 SampleStore 의 샘플은 그 부분집합
+    expected = {sample_id: value["avg_score"] for sample_id, value in grouped.items()
+                if utils.SAMPLE_ID_PATTERN.match(sample_id)}
+    actual = dict(zip(store.sample_ids.tolist(), store.avg_scores().tolist()))
+    assert actual == pytest.approx(expected)
+
+    invalid = {sample_id for sample_id, value in grouped.items() if sample_id in expected
+               and any(score["model_graded_qa"].get("value") not in utils.VALID_GRADES for score in value["scores"])}
+    assert set(store.invalid_sample_ids().tolist()) == invalid
+
+
+def test_cell_scores_match_grouped_data(stores):
+    store, grouped = stores
+    expected = utils.accumulate_cell_scores(grouped)
+    actual = store.cell_scores()
+    assert set(actual) == set(expected)
+    for key, (score_sum, count) in expected.items():
+        assert actual[key][1] == count
+        assert actual[key][0] == pytest.approx(score_sum)
+
+
+def test_generate_dataframe_accepts_store(stores):
+    store, grouped = stores
+    expected = utils.generate_dataframe_with_exclusions(utils.PROMPT_TYPES, utils.RISK_TYPES, grouped)
+    actual = utils.generate_dataframe_with_exclusions(utils.PROMPT_TYPES, utils.RISK_TYPES, store)
+    assert {r: set(row) for r, row in actual[0].items()} == {r: set(row) for r, row in expected[0].items()}
+    for r, row in expected[0].items():
+        assert actual[0][r] == pytest.approx(row)
+    # 샘플 순서는 다를 수 있으므로 그룹별로 정렬해서 비교
+    for new, old in zip(actual[1:], expected[1:]):
+        assert set(new) == set(old)
+        for name in old:
+            new_pairs, old_pairs = sorted(zip(*new[name])), sorted(zip(*old[name]))
+            assert [label for label, _ in new_pairs] == [label for label, _ in old_pairs]
+            np.testing.assert_allclose([s for _, s in new_pairs], [s for _, s in old_pairs])
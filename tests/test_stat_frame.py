@@ -0,0 +1,47 @@
+"""build_stat_frame / dic_return 이 처음 구현(iterrows × r01..r35 루프)과 같은 dict 를 만드는지 확인"""
+import os
+
+import pandas as pd
+import pytest
+
+import bench
+import utils
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXCEL_PATH = os.path.join(ROOT, "final_stat_summary.xlsx")
+
+
+def baseline_dic_return(excel_data):
+    # 처음 커밋의 app.dic_return (출력만 제거)
+    final_stat_dict = {}
+    for _, row in excel_data.iterrows():
+        prompt_code = row['prompt_code'].strip()
+        if prompt_code.startswith("pRP"):
+            prompt_code = "pRP"
+        for i in range(1, 36):
+            risk_code = f"r{i:02d}"
+            count_key = f"{risk_code}_count"
+            sum_base_score = f"{risk_code}_sum_base_score"
+            weighted_key = f"{risk_code}_weighted_score"
+            if pd.notna(row.get(count_key)) or pd.notna(row.get(sum_base_score)) or pd.notna(row.get(weighted_key)):
+                final_stat_dict[(risk_code, prompt_code)] = {
+                    "count": int(row[count_key]) if pd.notna(row[count_key]) else 0,
+                    "sum_base_score": float(row[sum_base_score]) if pd.notna(row[sum_base_score]) else 0.0,
+                    "weighted_mean_score": float(row[weighted_key]) if pd.notna(row[weighted_key]) else 0.0,
+                }
+    return final_stat_dict
+
+
+@pytest.mark.parametrize("source", ["workbook", "synthetic"])
+def test_dic_return_matches_iterrows(source, tmp_path):
+    if source == "workbook":
+        path = EXCEL_PATH
+    else:
+        path = bench.write_synthetic_summary(str(tmp_path / "summary.xlsx"), 40)
+    excel_data = pd.read_excel(path, sheet_name="Sheet1")
+
+    expected = baseline_dic_return(excel_data)
+    actual = utils.dic_return(excel_data)
+    # 값뿐 아니라 dict 순서(처음 등장 위치)도 같아야 함
+    assert list(actual) == list(expected)
+    assert actual == expected
@@ -1,10 +1,72 @@
 import numpy as np
 import pandas as pd
 import os
+import io
+import hashlib
 import zipfile
 import json
 import re
+import glob
+import multiprocessing
+import sys
+import threading
+import types
+from concurrent.futures import ProcessPoolExecutor
 from collections import OrderedDict, defaultdict
+from instrument import stage, timed
+
+# 대시보드 / CLI 공통 위험 카테고리 및 프롬프트 표시 이름
+RISK_TYPES = OrderedDict({
+    "r01": "01. Supporting Malicious Organized Groups",
+    "r02": "02. Celebrating Suffering",
+    "r03": "03. Violent Acts",
+    "r04": "04. Depicting Violence",
+    "r05": "05. Weapon Usage & Development",
+    "r06": "06. Military and Warfare",
+    "r07": "07. Harassment",
+    "r08": "08. Hate Speech",
+    "r09": "09. Offensive Language",
+    "r10": "10. Perpetuating Harmful Beliefs",
+    "r11": "11. Adult Content",
+    "r12": "12. Erotic Content",
+    "r13": "13. Non-Consensual Nudity",
+    "r14": "14. Monetized Sexual Content",
+    "r15": "15. Endangerment, Harm, or Abuse of Children",
+    "r16": "16. Child Sexual Abuse",
+    "r17": "17. Suicidal and Non-suicidal Self-injury",
+    "r18": "18. Political Persuasion",
+    "r19": "19. Influencing Politics",
+    "r20": "20. Deterring Democratic Participation",
+    "r21": "21. Fraud",
+    "r22": "22. Mis/disinformation",
+    "r23": "23. Sowing Division",
+    "r24": "24. Misrepresentation",
+    "r25": "25. Types of Defamation",
+    "r26": "26. Discriminatory Activities",
+    "r27": "27. Unauthorized Privacy Violations",
+    "r28": "28. Illegal/Regulated Substances",
+    "r29": "29. Illegal Services/Exploitation",
+    "r30": "30. Other Unlawful/Criminal Activities",
+    "r31": "31. Increased inequality and decline in employment quality",
+    "r32": "32. Economic and cultural devaluation of human effort",
+    "r33": "33. Competitive dynamics",
+    "r34": "34. Overreliance and unsafe use",
+    "r35": "35. Loss of human agency and autonomy"
+})
+
+PROMPT_TYPES = OrderedDict({
+    "pMC": "Multiple-Choice",
+    "pQO": "Q Only",
+    "pMS": "Multi-Session",
+    "pRP": "Role-Playing",   # RPemo, RPedu, RPfun 등은 모두 이걸로 통합
+    "pCT": "Chain of Thought",
+    "pEP": "Expert Prompting",
+    "pRL": "Rail",
+    "pRF": "Reflection"
+})
+
+# 로그 쪽 prompt id 는 'p' 접두어가 없음 (RP, MC ...)
+LOG_PROMPT_TYPES = {code[1:]: name for code, name in PROMPT_TYPES.items()}
 
 def get_risk_definitions():
     full_risk_labels = {
@@ -52,150 +114,766 @@ def normalize_prompt_id(prompt_id):
         return "RP"
     return prompt_id
 
-def generate_dataframe_with_exclusions(prompt_types, risk_types, sorted_grouped_data, transpose=False):
-    # 📌 평균 점수 집계를 위한 딕셔너리
-    risk_prompt_matrix = defaultdict(dict)
-    risk_bar_data = defaultdict(list)
-    prompt_bar_data = defaultdict(list)
+def fold_prompt_ids(prompt_ids):
+    """prompt id 배열에 normalize_prompt_id 를 한 번에 적용 (RPemo, RPedu ... → RP)"""
+    prompt_ids = np.asarray(prompt_ids, dtype=str)
+    return np.where(np.strings.startswith(prompt_ids, "RP"), "RP", prompt_ids)
+
+# 📌 파일 지문 (mtime/size 가 같으면 해시를 다시 계산하지 않음)
+_fingerprint_memo = {}
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _memo_sha1(path, stat):
+    memo_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    digest = _fingerprint_memo.get(memo_key)
+    if digest is None:
+        digest = file_sha1(path)
+        _fingerprint_memo[memo_key] = digest
+    return digest
+
+def file_fingerprint(path):
+    """파일의 mtime, 크기, 내용 해시를 묶은 캐시 키 문자열을 반환"""
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}-{_memo_sha1(path, stat)}"
+
+RISK_STAT_SUFFIXES = ("count", "sum_base_score", "weighted_score")
+RISK_STAT_COLUMN_PATTERN = re.compile(r"(r\d+)_(?:count|sum_base_score|weighted_score)$")
+
+def discover_risk_codes(names):
+    """열 이름에서 위험코드를 찾아 번호 순으로 반환 (r01..r35 로 고정하지 않음)"""
+    codes = {match.group(1) for match in map(RISK_STAT_COLUMN_PATTERN.match, map(str, names)) if match}
+    return sorted(codes, key=lambda code: (int(code[1:]), code))
+
+def build_stat_frame(excel_data, risk_codes=None, fold_variants=True):
+    """wide 형태(rNN_count / rNN_sum_base_score / rNN_weighted_score)의 요약 시트를
+    (risk_code, prompt_code) long 테이블로 한 번에 변환 (risk_codes 를 주지 않으면 시트의 열에서 찾음)"""
+    if risk_codes is None:
+        risk_codes = discover_risk_codes(excel_data.columns)
+    risk_codes = np.asarray(risk_codes)
+
+    # RP 파생형(pRPemo, pRPedu, pRPfun ...)을 'pRP'로 통합 (벡터 연산)
+    prompt_codes = excel_data['prompt_code'].astype(str).str.strip()
+    if fold_variants:
+        prompt_codes = prompt_codes.mask(prompt_codes.str.startswith("pRP"), "pRP")
+    prompt_codes = prompt_codes.to_numpy()
+
+    # (행, 통계 종류, 위험코드) 3차원 배열로 재구성. 없는 열은 NaN 으로 채움
+    columns = [f"{risk_code}_{suffix}" for suffix in RISK_STAT_SUFFIXES for risk_code in risk_codes]
+    values = excel_data.reindex(columns=columns).to_numpy(dtype=float)
+    values = values.reshape(len(excel_data), len(RISK_STAT_SUFFIXES), len(risk_codes))
+
+    # 세 값 중 하나라도 있으면 해당 (row, risk) 셀을 사용. np.nonzero 는 행 우선 순서라 기존 순회 순서와 동일
+    row_idx, risk_idx = np.nonzero(~np.isnan(values).all(axis=1))
+    cells = np.nan_to_num(values[row_idx, :, risk_idx])
+
+    stat_frame = pd.DataFrame({
+        "risk_code": risk_codes[risk_idx],
+        "prompt_code": prompt_codes[row_idx],
+        "count": cells[:, 0].astype(int),
+        "sum_base_score": cells[:, 1],
+        "weighted_mean_score": cells[:, 2],
+    })
+
+    # 같은 (risk, prompt) 가 여러 행에 있으면(pRP 통합) 값은 마지막 행, 순서는 처음 등장 위치 기준
+    keys = ["risk_code", "prompt_code"]
+    first_seen = stat_frame.drop_duplicates(keys, keep="first")[keys]
+    return first_seen.merge(stat_frame.drop_duplicates(keys, keep="last"), on=keys, how="left")
+
+@timed("dic_return")
+def dic_return(excel_data):
+    # 딕셔너리 생성: (risk_code, prompt_code) -> {count, sum_base_score, weighted_mean_score}
+    stat_frame = build_stat_frame(excel_data)
+    final_stat_dict = {
+        (risk_code, prompt_code): {
+            "count": int(count),
+            "sum_base_score": float(sum_base_score),
+            "weighted_mean_score": float(weighted_mean_score),
+        }
+        for risk_code, prompt_code, count, sum_base_score, weighted_mean_score
+        in stat_frame.itertuples(index=False, name=None)
+    }
+    print(f"✅ final_stat_dict 생성 완료: {len(final_stat_dict)}개 셀")
+    return final_stat_dict
+
+def extract_risk_number(risk_code: str) -> int:
+    """문자열에서 숫자만 추출하여 정수로 반환 ('r02' → 2, 'r10' → 10 등)"""
+    match = re.search(r"\d+", risk_code)
+    return int(match.group()) if match else float('inf')
+
+def build_heatmap_frames(final_stat_dict, risk_types, prompt_types):
+    """final_stat_dict → (가중평균 pivot, 산술평균 pivot) DataFrame 반환"""
+    # 딕셔너리를 리스트로 변환
+    records = []
+    for (risk_code, prompt_code), stats in final_stat_dict.items():
+        readable_risk_type = risk_types.get(risk_code, risk_code)  # fallback 처리 포함
+        readable_prompt_type = prompt_types.get(prompt_code, prompt_code)  # fallback 처리 포함
+
+        records.append({
+            "risk_code": risk_code.strip(),
+            "risk_type": readable_risk_type,
+            "prompt_type": readable_prompt_type,
+            "sum_base_score": stats["sum_base_score"],
+            "weighted_mean_score": stats["weighted_mean_score"]
+        })
 
-    # 📍 데이터 파싱
-    score_sum = defaultdict(lambda: defaultdict(float))
-    score_count = defaultdict(lambda: defaultdict(int))
+    # ✅ 숫자 기반 정렬 적용
+    with stage("records.sort"):
+        records.sort(key=lambda r: (extract_risk_number(r["risk_code"]), r["prompt_type"]))
+
+    # DataFrame → Pivot (행: prompt_code, 열: risk_code)
+    with stage("pivot"):
+        df = pd.DataFrame(records)
+
+        heatmap_df_weight = df.pivot(index="prompt_type", columns="risk_type", values="weighted_mean_score")
+        heatmap_df_avg = df.pivot(index="prompt_type", columns="risk_type", values="sum_base_score")
+
+    # 🔢 float으로 변환
+    return heatmap_df_weight.astype(float), heatmap_df_avg.astype(float)
+
+def summary_columns(names, risk_codes=None):
+    """names 중 build_stat_frame 이 실제로 읽는 열 (prompt_code + rNN_count / rNN_sum_base_score / rNN_weighted_score)
+
+    risk_codes 를 주지 않으면 시트에 있는 위험코드 열을 모두 사용
+    """
+    if risk_codes is None:
+        risk_codes = discover_risk_codes(names)
+    wanted = {"prompt_code"} | {f"{risk_code}_{suffix}" for suffix in RISK_STAT_SUFFIXES for risk_code in risk_codes}
+    return [name for name in names if name in wanted]
+
+def summary_sidecar_path(excel_path, sheet_name="Sheet1"):
+    return f"{excel_path}.{sheet_name}.parquet"
+
+def _sidecar_source(excel_path, with_sha1=False):
+    stat = os.stat(excel_path)
+    source = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if with_sha1:
+        source["sha1"] = _memo_sha1(excel_path, stat)
+    return source
+
+def _read_sidecar(sidecar_path, excel_path, columns):
+    """sidecar 가 원본 엑셀과 같은 내용이면 필요한 열만 읽어서 반환, 아니면 None"""
+    import pyarrow.parquet as pq
+
+    if not os.path.isfile(sidecar_path):
+        return None
+    schema = pq.read_schema(sidecar_path)
+    source = json.loads((schema.metadata or {}).get(b"source", b"{}"))
+    current = _sidecar_source(excel_path)
+    if source.get("size") != current["size"]:
+        return None
+    # mtime 만 바뀐 경우에는 내용 해시가 같으면 그대로 사용
+    if source.get("mtime_ns") != current["mtime_ns"] and source.get("sha1") != _sidecar_source(excel_path, with_sha1=True)["sha1"]:
+        return None
+    if columns is not None:
+        columns = _select_columns(columns, schema.names)
+    return pq.read_table(sidecar_path, columns=columns).to_pandas()
+
+def _write_sidecar(sidecar_path, excel_path, excel_data):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(excel_data, preserve_index=False)
+    source = _sidecar_source(excel_path, with_sha1=True)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"source": json.dumps(source).encode("utf-8")})
+    tmp_path = sidecar_path + ".tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, sidecar_path)
+
+def _select_columns(columns, names):
+    # columns: 열 이름 리스트 또는 전체 열 이름 → 읽을 열 이름 리스트 함수 (예: summary_columns)
+    if callable(columns):
+        return columns(names)
+    return [name for name in columns if name in names]
+
+def read_summary_sheet(excel_path, sheet_name="Sheet1", columns=None):
+    """요약 엑셀 시트 로드. 옆에 Parquet sidecar(<엑셀>.<시트>.parquet)를 두고, 엑셀이 바뀌었을 때만 openpyxl 로 다시 읽음
+
+    columns 를 주면 sidecar 에서 해당 열만 읽는다 (열 이름 리스트, 없는 열은 무시 / 또는 열 이름 목록을 받아 고르는 함수).
+    pyarrow 가 없거나 sidecar 를 쓸 수 없으면 엑셀만 사용
+    """
+    sidecar_path = summary_sidecar_path(excel_path, sheet_name)
+    try:
+        with stage("excel.sidecar_read"):
+            excel_data = _read_sidecar(sidecar_path, excel_path, columns)
+    except ImportError:
+        excel_data = None
+    except Exception as e:
+        print(f"⚠️ sidecar 읽기 실패, 엑셀에서 다시 읽음: {e}")
+        excel_data = None
+    if excel_data is not None:
+        return excel_data
+
+    with stage("excel.read"):
+        excel_data = pd.read_excel(excel_path, sheet_name=sheet_name)
+    try:
+        with stage("excel.sidecar_write"):
+            _write_sidecar(sidecar_path, excel_path, excel_data)
+    except ImportError:
+        pass
+    except Exception as e:
+        print(f"⚠️ sidecar 저장 실패: {e}")
+    if columns is not None:
+        excel_data = excel_data[_select_columns(columns, list(excel_data.columns))]
+    return excel_data
+
+def load_summary_matrices(excel_path, risk_types=RISK_TYPES, prompt_types=PROMPT_TYPES):
+    """요약 엑셀 → (final_stat_dict, 가중평균 pivot, 산술평균 pivot)"""
+    # 엑셀 시트 로드 (Parquet sidecar 가 최신이면 필요한 열만 sidecar 에서 읽음)
+    excel_data = read_summary_sheet(excel_path, "Sheet1", columns=summary_columns)
+    final_stat_dict = dic_return(excel_data)
+    heatmap_df_weight, heatmap_df_avg = build_heatmap_frames(final_stat_dict, risk_types, prompt_types)
+    return final_stat_dict, heatmap_df_weight, heatmap_df_avg
+
+# 샘플 id 예: r02_t01_pRPemo_001 → (r02, RPemo)
+SAMPLE_ID_PATTERN = re.compile(r"(r\d+)_t\d+_p(\w+)_\d+")
+
+# .eval 샘플 id 의 prompt 코드 → 표시 이름 (RP 파생형 포함)
+EVAL_PROMPT_TYPES = {
+    "pMC": "Multiple-Choice",
+    "pQO":"Q Only",
+    "pMS":"Multi-Session",
+    "pRP":"Role-Playing",
+    "pCT":"Chain of Thought",
+    "pEP":"Expert Prompting",
+    "pRL":"Rail",
+    "pRF":"Reflection",
+    "pRPfun":"Role-Playing (Functional)",
+    "pRPedu":"Role-Playing (Educational)",
+    "pRPemo":"Role-Playing (Emotional)"
+}
+
+# notMC_parsing 에서 샘플 id 로부터 (risk_code, prompt_code) 를 뽑는 패턴
+EVAL_ID_PATTERN = re.compile(r"(r\d{2})_.*?(p[^_]+)")
+
+VALID_GRADES = ["1", "2", "3", "4", "5"]
+
+def split_sample_ids(sample_ids):
+    """샘플 id 배열을 numpy 문자열 연산으로 한 번에 (risk_id, prompt_id) 로 분리
+
+    r02_t01_pRPemo_001 → ('r02', 'RPemo'). 형식이 다른 id 만 SAMPLE_ID_PATTERN 으로 다시 확인하고,
+    그래도 맞지 않으면 matched=False
+    """
+    sample_ids = np.asarray(sample_ids, dtype=str)
+    risk, _, rest = np.strings.partition(sample_ids, "_")
+    trial, _, rest = np.strings.partition(rest, "_")
+    prompt, _, number = np.strings.rpartition(rest, "_")
+    prompt_body = np.strings.slice(prompt, 1, None)
+
+    matched = (
+        np.strings.startswith(risk, "r") & np.strings.isdigit(np.strings.slice(risk, 1, None))
+        & np.strings.startswith(trial, "t") & np.strings.isdigit(np.strings.slice(trial, 1, None))
+        & np.strings.startswith(prompt, "p") & np.strings.isalnum(np.strings.replace(prompt_body, "_", ""))
+        & np.strings.isdigit(number)
+    )
 
-    for key, value in sorted_grouped_data.items():
-        # 🔍 정규표현식으로 rxx, pXX 추출
-        match = re.match(r"(r\d+)_t\d+_p(\w+)_\d+", key)
+    fallback = np.flatnonzero(~matched)
+    if len(fallback):
+        risk = risk.astype(object)
+        prompt_body = prompt_body.astype(object)
+    for i in fallback:
+        match = SAMPLE_ID_PATTERN.match(sample_ids[i])
         if match:
-            risk_id = match.group(1)
-            raw_prompt_id = match.group(2)
-            prompt_id = normalize_prompt_id(raw_prompt_id)
-            score = value.get("avg_score")
+            risk[i], prompt_body[i] = match.groups()
+            matched[i] = True
+    return risk, prompt_body, matched
+
+def encode_sample_scores(sorted_grouped_data):
+    """샘플 id 를 한 번만 파싱해서 (risk, prompt) 정수 코드 배열과 점수 배열로 변환
+    (notMC_parsing 결과 dict 또는 SampleStore 모두 가능)
+
+    반환값: (risk_codes, prompt_codes, scores, risk_ids, prompt_ids)
+    risk_ids[risk_codes[i]], prompt_ids[prompt_codes[i]] 가 i 번째 샘플의 원래 id
+    """
+    if hasattr(sorted_grouped_data, "avg_scores"):
+        # SampleStore: id / 점수 배열을 그대로 사용
+        sample_ids = sorted_grouped_data.sample_ids
+        scores = sorted_grouped_data.avg_scores()
+    else:
+        sample_ids = list(sorted_grouped_data.keys())
+        scores = np.array([value.get("avg_score") for value in sorted_grouped_data.values()], dtype=np.float64)
+    if not len(scores):
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty, scores, np.empty(0, dtype=object), np.empty(0, dtype=object)
+
+    # 🔍 rxx, pXX 추출 (배열 단위로 한 번에)
+    risk, prompt, matched = split_sample_ids(sample_ids)
+    if not matched.all():
+        for key in np.asarray(sample_ids, dtype=object)[~matched]:
+            print(f"[⚠️ 정규식 미일치] {key}")
 
-            if score is None:
-                continue
+    valid = matched & ~np.isnan(scores)
+    risk = risk[valid]
+    prompt = prompt[valid]
 
-            # 🏷️ 원래 이름으로 변환
-            risk_name = risk_types.get(risk_id, risk_id)
-            prompt_name = prompt_types.get(prompt_id, prompt_id)
+    risk_codes, risk_ids = pd.factorize(risk)
+    prompt_codes, prompt_ids = pd.factorize(prompt)
 
-            # 누적 합산 및 카운트
-            score_sum[risk_name][prompt_name] += score
-            score_count[risk_name][prompt_name] += 1
+    # RPemo, RPedu, RPfun 등은 모두 RP로 처리 (고유 id 단위로 정규화 후 코드 재매핑)
+    normalized_codes, prompt_ids = pd.factorize(fold_prompt_ids(prompt_ids))
+    prompt_codes = normalized_codes[prompt_codes]
 
-            # 바차트용 데이터도 계속 누적
-            risk_bar_data[risk_name].append((prompt_name, score))
-            prompt_bar_data[prompt_name].append((risk_name, score))
-        else:
-            print(f"[⚠️ 정규식 미일치] {key}")
+    return risk_codes, prompt_codes, scores[valid], np.asarray(risk_ids, dtype=object), np.asarray(prompt_ids, dtype=object)
+
+def _group_views(codes, labels, scores, n_groups):
+    # codes 기준으로 안정 정렬한 뒤 그룹별 구간을 잘라서 (labels, scores) 뷰로 반환
+    order = np.argsort(codes, kind="stable")
+    labels = labels[order]
+    scores = scores[order]
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=n_groups))))
+    return [(labels[bounds[g]:bounds[g + 1]], scores[bounds[g]:bounds[g + 1]]) for g in range(n_groups)]
+
+@timed("generate_dataframe_with_exclusions")
+def generate_dataframe_with_exclusions(prompt_types, risk_types, sorted_grouped_data, transpose=False):
+    """샘플별 avg_score → (risk, prompt) 셀 평균과 바차트용 데이터
+
+    risk_bar_data[risk_name] = (prompt_name 배열, score 배열),
+    prompt_bar_data[prompt_name] = (risk_name 배열, score 배열) 로 정렬된 배열의 뷰를 담음
+    """
+    risk_codes, prompt_codes, scores, risk_ids, prompt_ids = encode_sample_scores(sorted_grouped_data)
+
+    # 🏷️ 원래 이름으로 변환 (고유 id 개수만큼만)
+    risk_names = np.array([risk_types.get(r, r) for r in risk_ids], dtype=object)
+    prompt_names = np.array([prompt_types.get(p, p) for p in prompt_ids], dtype=object)
+    n_risk, n_prompt = len(risk_names), len(prompt_names)
+
+    # 📍 셀 단위 누적 합산 및 카운트
+    cell = risk_codes * n_prompt + prompt_codes
+    score_sum = np.bincount(cell, weights=scores, minlength=n_risk * n_prompt)
+    score_count = np.bincount(cell, minlength=n_risk * n_prompt)
 
     # ✅ 평균 계산하여 risk_prompt_matrix 생성
-    for r in score_sum:
-        for p in score_sum[r]:
-            avg_score = score_sum[r][p] / score_count[r][p]
-            risk_prompt_matrix[r][p] = avg_score
-        
-    return risk_prompt_matrix, risk_bar_data, prompt_bar_data
+    risk_prompt_matrix = defaultdict(dict)
+    for flat in np.flatnonzero(score_count):
+        r, p = divmod(flat, n_prompt)
+        risk_prompt_matrix[risk_names[r]][prompt_names[p]] = score_sum[flat] / score_count[flat]
 
-def style_dataframe(df, column_flags):
-    def apply_style(val, flag):
-        return 'background-color: #f5f5f5; color: #bbbbbb' if flag == 0 else ''
+    # 바차트용 데이터
+    risk_bar_data = dict(zip(risk_names, _group_views(risk_codes, prompt_names[prompt_codes], scores, n_risk)))
+    prompt_bar_data = dict(zip(prompt_names, _group_views(prompt_codes, risk_names[risk_codes], scores, n_prompt)))
 
-    styled_df = df.style.apply(
-        lambda col: [apply_style(v, column_flags[i]) for i, v in enumerate(col)], axis=0
-    ).format("{:.2f}")
+    return risk_prompt_matrix, risk_bar_data, prompt_bar_data
 
-    return styled_df
+def accumulate_cell_scores(sorted_grouped_data):
+    """샘플별 avg_score 를 (risk_id, prompt_id) 셀 단위 부분합/개수로 집계"""
+    risk_codes, prompt_codes, scores, risk_ids, prompt_ids = encode_sample_scores(sorted_grouped_data)
+    n_prompt = len(prompt_ids)
+    cell = risk_codes * n_prompt + prompt_codes
+    score_sum = np.bincount(cell, weights=scores, minlength=len(risk_ids) * n_prompt)
+    score_count = np.bincount(cell, minlength=len(risk_ids) * n_prompt)
+    return {
+        (risk_ids[flat // n_prompt], prompt_ids[flat % n_prompt]): (float(score_sum[flat]), int(score_count[flat]))
+        for flat in np.flatnonzero(score_count)
+    }
 
-def MC_parsing():
-    return 0
+def merge_cell_scores(partials):
+    """여러 로그의 부분 집계 {(risk_id, prompt_id): (score_sum, count)} 를 하나로 합침"""
+    merged = defaultdict(lambda: [0.0, 0])
+    for partial in partials:
+        for cell_key, (score_sum, count) in partial.items():
+            merged[cell_key][0] += score_sum
+            merged[cell_key][1] += count
+    return {cell_key: (score_sum, count) for cell_key, (score_sum, count) in merged.items()}
+
+def matrix_from_cell_scores(prompt_types, risk_types, cell_stats):
+    """부분 집계 → generate_dataframe_with_exclusions 와 같은 risk_prompt_matrix[risk_name][prompt_name]"""
+    risk_prompt_matrix = defaultdict(dict)
+    for (risk_id, prompt_id), (score_sum, count) in cell_stats.items():
+        if count:
+            risk_name = risk_types.get(risk_id, risk_id)
+            prompt_name = prompt_types.get(prompt_id, prompt_id)
+            risk_prompt_matrix[risk_name][prompt_name] = score_sum / count
+    return risk_prompt_matrix
+
+def log_heatmap_frame(cell_stats, prompt_types=LOG_PROMPT_TYPES, risk_types=RISK_TYPES):
+    """로그 부분 집계 → 산술평균 heatmap DataFrame (행: prompt_type, 열: risk_type, 대시보드 pivot 과 같은 방향)
+
+    prompt_types 는 로그 쪽 prompt id ('p' 접두어 없음) 기준
+    """
+    matrix = matrix_from_cell_scores(prompt_types, risk_types, cell_stats)
+    return pd.DataFrame(matrix).sort_index(axis=0).sort_index(axis=1).astype(float)
+
+# 워커를 띄우는 동안 sys.modules['__main__'] / sys.path 를 잠깐 바꿔 두므로 동시에 하나만
+_MAIN_SWAP_LOCK = threading.Lock()
+# 워커가 utils, sample_store ... 를 import 할 수 있도록 sys.path 에 넣어 줄 저장소 디렉터리
+_MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class _ScriptlessSpawnProcess(multiprocessing.context.SpawnProcess):
+    """__main__ 스크립트를 다시 실행하지 않는 spawn 프로세스
+
+    spawn 워커는 시작할 때 부모의 __main__.__file__ 을 __mp_main__ 으로 다시 실행하는데, Streamlit 은
+    __main__ 을 app.py 로 바꿔 두므로 워커마다 대시보드 전체(엑셀 로드, heatmap 렌더링)가 한 번씩 돌아감.
+    풀에 넘기는 함수는 모두 모듈 수준 함수라 __main__ 이 필요 없으므로 프로세스를 띄우는 동안만 빈 모듈로 바꿈.
+    Streamlit 은 스크립트가 도는 동안만 app.py 디렉터리를 sys.path 에 넣으므로 (watcher 스레드는 그 밖에서 워커를 띄움)
+    워커에 넘어가는 sys.path 에 저장소 디렉터리도 같이 넣어 둠
+    """
+    @staticmethod
+    def _Popen(process_obj):
+        blank_main = types.ModuleType("__main__")
+        with _MAIN_SWAP_LOCK:
+            main = sys.modules["__main__"]
+            sys.modules["__main__"] = blank_main
+            added_path = _MODULE_DIR not in sys.path
+            if added_path:
+                sys.path.insert(0, _MODULE_DIR)
+            try:
+                return multiprocessing.context.SpawnProcess._Popen(process_obj)
+            finally:
+                # 그사이 Streamlit 이 다른 스크립트 실행으로 __main__ 을 바꿨으면 그대로 둠
+                if sys.modules.get("__main__") is blank_main:
+                    sys.modules["__main__"] = main
+                if added_path and _MODULE_DIR in sys.path:
+                    sys.path.remove(_MODULE_DIR)
+
+class _ScriptlessSpawnContext(multiprocessing.context.SpawnContext):
+    Process = _ScriptlessSpawnProcess
+
+def process_pool(max_workers=None):
+    """spawn 방식 프로세스 풀. Streamlit 서버처럼 스레드가 여러 개인 프로세스에서 fork 하면
+    다른 스레드가 잡고 있던 lock 을 그대로 물려받아 워커가 멈출 수 있음.
+    워커는 __main__ 스크립트(app.py, cli.py ...)를 다시 import 하지 않음"""
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=_ScriptlessSpawnContext())
+
+def parallel_map(func, items, max_workers=None, chunksize=None):
+    """[func(item) for item in items] 를 프로세스 풀에서 실행 (순서 유지)
+
+    작업이 1개 이하이거나 max_workers == 1 이면 풀을 띄우지 않고 현재 프로세스에서 실행
+    """
+    items = list(items)
+    if len(items) <= 1 or max_workers == 1:
+        return [func(item) for item in items]
+    max_workers = min(max_workers or os.cpu_count() or 1, len(items))
+    if chunksize is None:
+        chunksize = max(1, len(items) // (4 * max_workers))
+    with process_pool(max_workers) as executor:
+        return list(executor.map(func, items, chunksize=chunksize))
+
+def _ingest_one(eval_path):
+    # 프로세스 풀 워커: 로그 하나를 SampleStore 로 읽어서 셀 단위 부분 집계만 돌려줌 (input 원문은 읽지 않음)
+    from sample_store import SampleStore
+    return SampleStore.from_eval(eval_path).cell_scores()
+
+def find_eval_logs(source):
+    """디렉터리, glob 패턴, 경로 리스트 중 무엇이든 받아서 .eval 파일 목록 반환"""
+    if isinstance(source, (list, tuple)):
+        return sorted(source)
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, '*.eval')))
+    return sorted(glob.glob(source))
+
+def ingest_eval_logs(source, max_workers=None):
+    """여러 .eval 로그를 프로세스 풀에서 병렬 파싱하고 셀 단위 부분 집계를 병합해서 반환"""
+    eval_paths = find_eval_logs(source)
+    if not eval_paths:
+        raise FileNotFoundError(f".eval 파일이 없습니다: {source}")
+
+    partials = parallel_map(_ingest_one, eval_paths, max_workers)
+
+    print(f"📦 로그 {len(eval_paths)}개 병합 완료")
+    return merge_cell_scores(partials)
+
+def aggregate_eval_file(eval_path):
+    """로그 하나를 (risk_id, prompt_id) 셀 / (risk_id, prompt_id, epoch) 단위 컬럼 배열로 집계"""
+    from sample_store import INVALID_GRADE, SampleStore
+
+    store = SampleStore.from_eval(eval_path)
+    cell_keys = list(store.cell_scores().items())
+
+    # epoch 단위: (risk, prompt, epoch) 별 유효 채점 합 / 개수 / 잘못된 채점 수 (셀은 cell_scores 와 같은 배치)
+    cell, risk_ids, prompt_ids = store.cell_layout()
+    epochs, epoch_codes = np.unique(store.epoch, return_inverse=True)
+    shape = (len(risk_ids), len(prompt_ids), len(epochs))
+    flat = cell[store.sample_index] * len(epochs) + epoch_codes
+    invalid = store.grade == INVALID_GRADE
+    size = int(np.prod(shape))
+    epoch_score_sum = np.bincount(flat, weights=store.scores(), minlength=size)
+    epoch_count = np.bincount(flat, weights=~invalid, minlength=size).astype(np.int64)
+    epoch_invalid = np.bincount(flat, weights=invalid, minlength=size).astype(np.int64)
+    present = np.flatnonzero(epoch_count + epoch_invalid)
+    r, p, e = np.unravel_index(present, shape)
+
+    return {
+        "risk_id": np.array([k[0] for k, _ in cell_keys], dtype=str),
+        "prompt_id": np.array([k[1] for k, _ in cell_keys], dtype=str),
+        "score_sum": np.array([v[0] for _, v in cell_keys], dtype=np.float64),
+        "count": np.array([v[1] for _, v in cell_keys], dtype=np.int64),
+        "epoch_risk_id": risk_ids[r].astype(str),
+        "epoch_prompt_id": prompt_ids[p].astype(str),
+        "epoch": epochs[e].astype(np.int32),
+        "epoch_score_sum": epoch_score_sum[present],
+        "epoch_count": epoch_count[present],
+        "epoch_invalid": epoch_invalid[present],
+    }
 
-def notMC_parsing(file_name):
-    prompt_types = {
-    "pMC": "Multiple-Choice",
-    "pQO":"Q Only",
-    "pMS":"Multi-Session",
-    "pRP":"Role-Playing",
-    "pCT":"Chain of Thought",
-    "pEP":"Expert Prompting",
-    "pRL":"Rail",
-    "pRF":"Reflection",
-    "pRPfun":"Role-Playing (Functional)",
-    "pRPedu":"Role-Playing (Educational)",
-    "pRPemo":"Role-Playing (Emotional)"
+def cell_scores_from_aggregate(aggregate):
+    """aggregate_eval_file 결과 → {(risk_id, prompt_id): (score_sum, count)}"""
+    return {
+        (risk_id, prompt_id): (float(score_sum), int(count))
+        for risk_id, prompt_id, score_sum, count
+        in zip(aggregate["risk_id"], aggregate["prompt_id"], aggregate["score_sum"], aggregate["count"])
     }
 
-    # 원본 파일과 변경할 이름
-    original_file = os.path.join('log', f'{file_name}.eval')
-    renamed_file = os.path.join('log', f'{file_name}.zip')
+def _read_manifest(manifest_path):
+    if not os.path.isfile(manifest_path):
+        return {}
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _write_manifest(manifest_path, manifest):
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, manifest_path)
+
+def _remove_unused_cache(cache_dir, manifest, cache_name):
+    # 내용이 같은 로그끼리는 같은 <sha1>.npz 를 공유하므로, 다른 항목이 쓰지 않을 때만 삭제
+    if any(entry["cache_file"] == cache_name for entry in manifest.values()):
+        return
+    try:
+        os.remove(os.path.join(cache_dir, cache_name))
+    except FileNotFoundError:
+        pass
+
+def load_aggregates(source, cache_dir='agg_cache', max_workers=None):
+    """로그별 집계를 npz 캐시에서 읽고, 새로 생기거나 바뀐 .eval 만 다시 파싱
+
+    manifest.json 에 원본 파일의 size / mtime / sha1 을 기록. size·mtime 이 같으면 그대로 사용하고,
+    mtime 만 바뀐 경우에는 해시를 비교해서 내용이 같으면 재파싱하지 않음.
+    반환값: {eval_path: aggregate_eval_file 형식의 배열 dict}
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest_path = os.path.join(cache_dir, 'manifest.json')
+    manifest = _read_manifest(manifest_path)
+
+    aggregates = {}
+    stale = []
+    for eval_path in find_eval_logs(source):
+        abs_path = os.path.abspath(eval_path)
+        stat = os.stat(eval_path)
+        entry = manifest.get(abs_path)
+        cache_file = os.path.join(cache_dir, entry["cache_file"]) if entry else None
+
+        if entry and os.path.isfile(cache_file):
+            unchanged = entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns
+            if not unchanged and entry["size"] == stat.st_size and entry["sha1"] == file_sha1(eval_path):
+                entry["mtime_ns"] = stat.st_mtime_ns
+                unchanged = True
+            if unchanged:
+                with np.load(cache_file, allow_pickle=False) as npz:
+                    aggregates[eval_path] = {name: npz[name] for name in npz.files}
+                continue
+        stale.append(eval_path)
+
+    if stale:
+        results = parallel_map(aggregate_eval_file, stale, max_workers)
+
+        for eval_path, aggregate in zip(stale, results):
+            stat = os.stat(eval_path)
+            digest = file_sha1(eval_path)
+            cache_name = f"{digest}.npz"
+            np.savez(os.path.join(cache_dir, cache_name), **aggregate)
+            previous = manifest.get(os.path.abspath(eval_path))
+            manifest[os.path.abspath(eval_path)] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha1": digest,
+                "cache_file": cache_name,
+            }
+            if previous:
+                _remove_unused_cache(cache_dir, manifest, previous["cache_file"])
+            aggregates[eval_path] = aggregate
+
+    # 원본 로그가 사라진 항목은 manifest 와 캐시 파일에서 제거 (캐시 폴더가 계속 커지지 않도록)
+    for abs_path in [path for path in manifest if not os.path.isfile(path)]:
+        _remove_unused_cache(cache_dir, manifest, manifest.pop(abs_path)["cache_file"])
+
+    _write_manifest(manifest_path, manifest)
+    print(f"🗃️ 집계 캐시: {len(aggregates) - len(stale)}개 재사용, {len(stale)}개 새로 파싱")
+    return aggregates
+
+# 제외 행/열 흐리게 표시 (Styler CSS)
+DIMMED_CSS = 'background-color: #f5f5f5; color: #bbbbbb'
+
+def excluded_label_mask(labels, excluded_ids):
+    """라벨이 '1.', '5.' 처럼 제외 번호 + '.' 으로 시작하면 True 인 bool 배열 (정규식 한 번으로 계산)"""
+    labels = pd.Index(labels).astype(str)
+    if not excluded_ids:
+        return np.zeros(len(labels), dtype=bool)
+    pattern = "|".join(re.escape(str(i)) for i in sorted(excluded_ids))
+    return np.asarray(labels.str.match(rf"(?:{pattern})\."), dtype=bool)
+
+def style_mask(df, row_mask=None, col_mask=None, css=DIMMED_CSS):
+    """행/열 mask → Styler.apply(..., axis=None) 용 CSS DataFrame (셀마다 콜백을 부르지 않고 브로드캐스트 한 번)"""
+    mask = np.zeros(df.shape, dtype=bool)
+    if row_mask is not None:
+        mask |= np.asarray(row_mask, dtype=bool)[:, None]
+    if col_mask is not None:
+        mask |= np.asarray(col_mask, dtype=bool)[None, :]
+    return pd.DataFrame(np.where(mask, css, ''), index=df.index, columns=df.columns)
 
-    # 압축을 풀 대상 폴더 (현재 폴더 기준)
-    extract_to = os.path.join('unzipped', f'{file_name}')
+def style_dataframe(df, column_flags):
+    # column_flags[i] == 0 인 i 번째 행을 흐리게 표시
+    row_mask = np.asarray(column_flags) == 0
+    return df.style.apply(style_mask, axis=None, row_mask=row_mask).format("{:.2f}")
 
-    # .zip으로 확장자 변경한 파일이 없으면 이름바꾸고 압축 해제까지 실행
-    if os.path.isfile(original_file) and not os.path.isfile(renamed_file):
-        os.rename(original_file, renamed_file)
+def MC_parsing():
+    return 0
+
+def iter_json_array(fp, chunk_size=1 << 20, with_offsets=False):
+    """최상위가 JSON 배열인 텍스트 스트림에서 원소를 하나씩 파싱해서 yield (전체 리스트를 만들지 않음)
+
+    with_offsets=True 이면 (item, byte_start, byte_end) 를 yield. 오프셋은 UTF-8 기준 스트림 내 위치
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+    started = False
+    # 오프셋 계산용 커서: buf[cursor_char] 의 스트림 내 byte 위치가 cursor_byte (앞으로만 이동하므로 전체 O(n))
+    cursor_char = 0
+    cursor_byte = 0
+
+    def byte_at(index):
+        nonlocal cursor_char, cursor_byte
+        cursor_byte += len(buf[cursor_char:index].encode('utf-8'))
+        cursor_char = index
+        return cursor_byte
+
+    while True:
+        # 공백/구분자 건너뛰기, 버퍼가 비면 다음 청크 읽기
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            if with_offsets:
+                byte_at(len(buf))
+                cursor_char = 0
+            buf = fp.read(chunk_size)
+            pos = 0
+            eof = not buf
+
+        if pos >= len(buf):
+            if started:
+                raise ValueError("JSON 배열이 닫히지 않았습니다")
+            return
+
+        if not started:
+            if buf[pos] != "[":
+                raise ValueError("summaries.json 최상위가 배열이 아닙니다")
+            started = True
+            pos += 1
+            continue
 
-        # # 압축 해제 실행
-        with zipfile.ZipFile(renamed_file, 'r') as zip_ref:
-            zip_ref.extractall(extract_to)
-        print(f"'{renamed_file}' 압축 해제 완료 → 폴더: {extract_to}")
+        if buf[pos] == "]":
+            return
+
+        start = pos
+        try:
+            item, pos = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # 원소가 청크 경계에 걸린 경우: 남은 부분 + 다음 청크로 다시 시도 (큰 원소는 읽는 양을 늘림)
+            more = fp.read(max(chunk_size, len(buf) - pos))
+            eof = not more
+            if with_offsets:
+                byte_at(pos)
+                cursor_char = 0
+            buf = buf[pos:] + more
+            pos = 0
+            continue
+        if with_offsets:
+            yield item, byte_at(start), byte_at(pos)
+        else:
+            yield item
+
+def resolve_eval_path(file_name, log_dir='log'):
+    """log/<name>.eval 경로 반환. 예전 방식으로 이름이 바뀐 .zip / 압축 해제 폴더도 그대로 지원"""
+    candidates = [
+        os.path.join(log_dir, f'{file_name}.eval'),
+        os.path.join(log_dir, f'{file_name}.zip'),
+        os.path.join('unzipped', f'{file_name}', 'summaries.json'),
+    ]
+    for path in candidates:
+        if os.path.isfile(path):
+            return path
+    raise FileNotFoundError(f"로그 파일을 찾을 수 없습니다: {candidates[0]}")
+
+def iter_eval_summaries(eval_path, member='summaries.json', with_offsets=False):
+    """.eval(zip) 아카이브를 이름 변경/압축 해제 없이 읽기 전용으로 열고 summaries.json 샘플을 스트리밍"""
+    # newline='' : 줄바꿈 변환을 하지 않아야 byte 오프셋이 원본과 일치
+    if zipfile.is_zipfile(eval_path):
+        with zipfile.ZipFile(eval_path, 'r') as zf:
+            with zf.open(member, 'r') as raw:
+                yield from iter_json_array(io.TextIOWrapper(raw, encoding='utf-8', newline=''), with_offsets=with_offsets)
+    else:
+        with open(eval_path, 'r', encoding='utf-8', newline='') as f:
+            yield from iter_json_array(f, with_offsets=with_offsets)
+
+def notMC_parsing(file_name):
+    return parse_eval_file(resolve_eval_path(file_name))
 
-    # summaries.json 파일 경로
-    json_path = os.path.join(extract_to, 'summaries.json')
+def parse_eval_file(eval_path):
+    prompt_types = EVAL_PROMPT_TYPES
 
-    # JSON 파일 로드
-    with open(json_path, 'r', encoding='utf-8') as f:
-        json_data = json.load(f)
-    print("📄 summaries.json 로드 완료")
+    # .eval 아카이브를 직접 열어서 summaries.json 을 샘플 단위로 스트리밍
+    json_data = iter_eval_summaries(eval_path)
 
     # 결과 리스트 초기화
     grouped_data = defaultdict(lambda: {"input": None, "risk_code": None, "prompt_type": None, "avg_score": None, "scores": []})
 
     # 데이터 분류
-    for item in json_data:
-        id_ = item["id"]
-        input_ = item["input"]
-        epoch = item["epoch"]
-        model_score = item.get("scores", {}).get("model_graded_qa", {})
-
-        match = re.search(r"(r\d{2})_.*?(p[^_]+)", id_)
-        if not match:
-            continue
-        risk_code, prompt_code = match.groups()
-
-        grouped_data[id_]["input"] = input_
-        grouped_data[id_]["risk_code"] = risk_code # 리스크 카테고리 명을 표시하려면 매핑 작업 추가적으로 필요
-        grouped_data[id_]["prompt_type"] = prompt_types[prompt_code]
-        grouped_data[id_]["scores"].append({
-            "epoch": epoch,
-            "model_graded_qa": model_score
-        })
+    with stage("notMC_parsing.load_group"):
+        for item in json_data:
+            id_ = item["id"]
+            input_ = item["input"]
+            epoch = item["epoch"]
+            model_score = item.get("scores", {}).get("model_graded_qa", {})
+
+            match = EVAL_ID_PATTERN.search(id_)
+            if not match:
+                continue
+            risk_code, prompt_code = match.groups()
 
-    # 정렬: epoch 오름차순
-    for entry in grouped_data.values():
-        entry["scores"].sort(key=lambda x: x["epoch"])
+            grouped_data[id_]["input"] = input_
+            grouped_data[id_]["risk_code"] = risk_code # 리스크 카테고리 명을 표시하려면 매핑 작업 추가적으로 필요
+            grouped_data[id_]["prompt_type"] = prompt_types[prompt_code]
+            grouped_data[id_]["scores"].append({
+                "epoch": epoch,
+                "model_graded_qa": model_score
+            })
 
+    # 정렬: epoch 오름차순
+    with stage("notMC_parsing.sort"):
+        for entry in grouped_data.values():
+            entry["scores"].sort(key=lambda x: x["epoch"])
 
-    # dict의 key 값을 오름차순으로 정리. 지금 필요는 없지만, keys()를 사용할 경우를 대비해서 일단 정렬
-    sorted_grouped_data = OrderedDict(
-        sorted(grouped_data.items(), key=lambda x: x[0])  # x[0]은 id
-    )
+        # dict의 key 값을 오름차순으로 정리. 지금 필요는 없지만, keys()를 사용할 경우를 대비해서 일단 정렬
+        sorted_grouped_data = OrderedDict(
+            sorted(grouped_data.items(), key=lambda x: x[0])  # x[0]은 id
+        )
 
     # epoch 별 스코어의 평균 점수(avg_score) 계산
-    for key in sorted_grouped_data.keys():
-        score_sum=0.0
-
-        if isinstance(sorted_grouped_data[key]['scores'], list):
-            for i in range(len(sorted_grouped_data[key]["scores"])):
-                if sorted_grouped_data[key]["scores"][i]["model_graded_qa"]["value"] in ["1", "2", "3", "4", "5"]:
-                    score_sum += float(sorted_grouped_data[key]["scores"][i]["model_graded_qa"]["value"])
-                else:
-                    print(f'[GRADE 오류 발생] data id: {key}')
-            avg_score = ( score_sum / len(sorted_grouped_data[key]["scores"]) )
-            sorted_grouped_data[key]["avg_score"] = avg_score
-        else:
-            sorted_grouped_data[key]["avg_score"] = sorted_grouped_data[key]["scores"]["model_graded_qa"]["value"]
-
+    with stage("notMC_parsing.average"):
+        for key in sorted_grouped_data.keys():
+            score_sum=0.0
+
+            if isinstance(sorted_grouped_data[key]['scores'], list):
+                for i in range(len(sorted_grouped_data[key]["scores"])):
+                    if sorted_grouped_data[key]["scores"][i]["model_graded_qa"]["value"] in VALID_GRADES:
+                        score_sum += float(sorted_grouped_data[key]["scores"][i]["model_graded_qa"]["value"])
+                    else:
+                        print(f'[GRADE 오류 발생] data id: {key}')
+                avg_score = ( score_sum / len(sorted_grouped_data[key]["scores"]) )
+                sorted_grouped_data[key]["avg_score"] = avg_score
+            else:
+                sorted_grouped_data[key]["avg_score"] = sorted_grouped_data[key]["scores"]["model_graded_qa"]["value"]
 
     # # 터미널에 결과 출력 (요약)
     # for id_, data in sorted_grouped_data.items():
@@ -212,11 +890,12 @@ def notMC_parsing(file_name):
     # ✅ 제외된 risk 행에 회색 스타일 적용
 
 def highlight_excluded_rows_factory(excluded_ids):
+    """df.style.apply(..., axis=1) 용 행 단위 함수 (표 전체를 한 번에 칠하려면 style_mask + excluded_label_mask)"""
     excluded_prefixes = tuple(f"{i}." for i in sorted(excluded_ids))
 
     def highlight_excluded_rows(row):
         if any(str(row.name).startswith(prefix) for prefix in excluded_prefixes):
-            return ['background-color: #f5f5f5; color: #bbbbbb'] * len(row)
+            return [DIMMED_CSS] * len(row)
         return [''] * len(row)
 
-    return highlight_excluded_rows
\ No newline at end of file
+    return highlight_excluded_rows